@@ -0,0 +1,46 @@
+"""measure the memory held by hydrated entities
+
+    python benchmarks/entity_memory.py [entities] [fields]
+"""
+import gc
+import sys
+import tracemalloc
+
+from gizmo.entity import GenericVertex
+
+
+def build_rows(count, width):
+    rows = []
+
+    for i in range(count):
+        row = {'id': [{'id': i, 'value': str(i)}]}
+
+        for f in range(width):
+            name = 'field_{}'.format(f)
+            row[name] = [{'id': f, 'value': 'value {}'.format(f)}]
+
+        rows.append(row)
+
+    return rows
+
+
+def measure(count, width):
+    rows = build_rows(count, width)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [GenericVertex(row) for row in rows]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return (after - before) / len(entities)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    per_entity = measure(count, width)
+
+    print('{} entities with {} fields: {:.0f} bytes per entity, {:.0f} per '
+          'field'.format(count, width, per_entity, per_entity / (width + 4)))
@@ -0,0 +1,30 @@
+"""time FieldManager.data on wide entities
+
+    python benchmarks/field_data.py [fields] [values] [runs]
+"""
+import sys
+import timeit
+
+from gizmo.entity import GenericVertex
+
+
+def build_entity(width, values):
+    row = {}
+
+    for f in range(width):
+        name = 'field_{}'.format(f)
+        row[name] = [{'id': v, 'value': 'value {}'.format(v)}
+                     for v in range(values)]
+
+    return GenericVertex(row)
+
+
+if __name__ == '__main__':
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    values = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    entity = build_entity(width, values)
+    elapsed = timeit.timeit(lambda: entity.fields.data, number=runs)
+
+    print('FieldManager.data on {} fields with {} values: {:.3f} ms per '
+          'call'.format(width, values, elapsed / runs * 1000))
@@ -0,0 +1,45 @@
+"""time translating GraphSON vertices and hydrating them into entities
+
+    python benchmarks/hydrate_graphson.py [vertices] [properties] [runs]
+"""
+import sys
+import timeit
+
+from gizmo.connection import Response
+from gizmo.entity import GenericVertex
+
+
+def build_result(count, width):
+    data = []
+
+    for i in range(count):
+        properties = {}
+
+        for p in range(width):
+            name = 'property_{}'.format(p)
+            properties[name] = [{'id': '{}-{}'.format(i, p),
+                                 'value': 'value {}'.format(p)}]
+
+        data.append({'id': i, 'label': 'vertex', 'type': 'vertex',
+                     'properties': properties})
+
+    return {'data': data}
+
+
+def hydrate(result, snapshot):
+    response = Response(result=result, copy_on_write=True)
+
+    return [GenericVertex(data, snapshot=snapshot) for data in response.data]
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    result = build_result(count, width)
+
+    for snapshot in (True, False):
+        elapsed = timeit.timeit(lambda: hydrate(result, snapshot), number=runs)
+
+        print('{} vertices with {} properties, snapshot={}: {:.1f} ms per '
+              'run'.format(count, width, snapshot, elapsed / runs * 1000))
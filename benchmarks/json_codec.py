@@ -0,0 +1,56 @@
+"""compare the request codecs on a GraphSON vertex response frame
+
+    python benchmarks/json_codec.py [vertices] [properties] [runs]
+"""
+import sys
+import timeit
+
+from gizmo.connection import JSONCodec, OrjsonCodec, UJSONCodec
+from gizmo.exception import AstronomerConnectionException
+
+
+def build_frame(count, width):
+    data = []
+
+    for i in range(count):
+        properties = {}
+
+        for p in range(width):
+            name = 'property_{}'.format(p)
+            properties[name] = [{'id': '{}-{}'.format(i, p),
+                                 'value': 'value {}'.format(p)}]
+
+        data.append({'id': i, 'label': 'vertex', 'type': 'vertex',
+                     'properties': properties})
+
+    return {
+        'requestId': '5f9a6c2e-0d43-4a1b-9b8e-3c7a2d1e4f60',
+        'status': {'code': 200, 'message': '', 'attributes': {}},
+        'result': {'data': data, 'meta': {}},
+    }
+
+
+def codecs():
+    for codec in (JSONCodec, OrjsonCodec, UJSONCodec):
+        try:
+            yield codec()
+        except AstronomerConnectionException:
+            print('{} is not available'.format(codec.__name__))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    frame = build_frame(count, width)
+    encoded = JSONCodec().encode(frame)
+
+    for codec in codecs():
+        encode = timeit.timeit(lambda: codec.encode(frame), number=runs)
+        decode = timeit.timeit(lambda: codec.decode(encoded), number=runs)
+
+        print('{}: encode {:.2f} ms, decode {:.2f} ms ({} vertices with {} '
+              'properties, {} bytes)'.format(codec.__class__.__name__,
+                                              encode / runs * 1000,
+                                              decode / runs * 1000, count,
+                                              width, len(encoded)))
@@ -0,0 +1,53 @@
+"""time Mapper.data over a collection whose mapper method waits on I/O
+
+    python benchmarks/mapper_data.py [entities] [latency ms] [concurrency]
+"""
+import asyncio
+import sys
+import time
+
+from gizmo.connection import Response
+from gizmo.entity import Vertex
+from gizmo.mapper import Collection, EntityMapper, Mapper
+
+
+class BenchVertex(Vertex):
+    allow_undefined = True
+
+
+def build_mapper(latency):
+
+    class BenchVertexMapper(EntityMapper):
+        entity = BenchVertex
+
+        async def fetch(self, entity, data):
+            await asyncio.sleep(latency)
+            return data
+
+    return Mapper(request=None)
+
+
+async def run(mapper, response, concurrency):
+    collection = Collection(mapper, response)
+    start = time.perf_counter()
+
+    await mapper.data(collection, 'fetch', concurrency=concurrency)
+
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == '__main__':
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    mapper = build_mapper(latency / 1000)
+    response = Response()
+    response.result = {'data': [dict(mapper.create({'name': i},
+        BenchVertex).data) for i in range(entities)]}
+    loop = asyncio.new_event_loop()
+
+    for limit in (None, concurrency):
+        elapsed = loop.run_until_complete(run(mapper, response, limit))
+
+        print('Mapper.data on {} entities, concurrency {}: {:.1f} ms'.format(
+            entities, limit or 1, elapsed))
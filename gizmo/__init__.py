@@ -1,7 +1,10 @@
 from .version import __version__
-from .connection import Request, Response
+from .cache import EntityCache, QueryCache
+from .connection import (Request, Response, JSONCodec, OrjsonCodec,
+    UJSONCodec, GraphSONCodec, GraphSONReader)
 from .entity import Vertex, GenericVertex, Edge, GenericEdge
 from .exception import (AstronomerFieldException, AstronomerEntityException,
     AstronomerMapperException, AstronomerQueryException)
 from .field import String, Integer, Float, Map, List, Increment, Boolean
-from .mapper import Collection, Query, Mapper
+from .mapper import (Collection, StreamingCollection, Query, Mapper,
+    DataLoader, IdentityMap)
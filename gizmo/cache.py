@@ -0,0 +1,368 @@
+import asyncio
+import copy
+import sys
+import threading
+import time
+
+from collections import OrderedDict
+
+from .util import GIZMO_ID, GIZMO_LABEL, GIZMO_PARAM, _debug_pattern
+
+
+class EntityCache(object):
+    """second level cache of the translated payloads of entities keyed by
+    their label and id. It can be shared by every Mapper in the process:
+
+        cache = EntityCache(max_size=10000, ttl=30)
+        mapper = Mapper(request, entity_cache=cache)
+
+    plain id lookups, like mapper.start(user).to_collection(), are answered
+    from it and saving or deleting an entity through a mapper using it
+    invalidates its entry. The least recently used entries are evicted past
+    max_size and entries expire ttl seconds after they were stored, ttl=None
+    keeps them until they are evicted. Payloads are copied in and out so
+    that changes made to the hydrated entities never reach the cache
+    """
+
+    def __init__(self, max_size=1024, ttl=60, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._invalidated = OrderedDict()
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def entity_key(entity):
+        return entity[GIZMO_LABEL[0]], str(entity[GIZMO_ID])
+
+    def get(self, label, _id):
+        key = (label, str(_id))
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] is not None and \
+                    entry[0] <= self.clock():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        return copy.deepcopy(entry[1])
+
+    def generation(self):
+        """taken before looking an entity up, see set"""
+        with self._lock:
+            return self._generation
+
+    def set(self, label, _id, payload, generation=None):
+        """stores the payload unless its entry was invalidated after
+        generation was taken, the payload was then read before the write"""
+        key = (label, str(_id))
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        payload = copy.deepcopy(payload)
+
+        with self._lock:
+            if generation is not None and generation < max(
+                    self._floor, self._invalidated.get(key, 0)):
+                return
+
+            self._entries[key] = (expires, payload)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, label, _id):
+        key = (label, str(_id))
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+
+            # only the latest invalidations are remembered, the ones that are
+            # forgotten raise the generation every lookup is compared to
+            while len(self._invalidated) > self.max_size:
+                _, self._floor = self._invalidated.popitem(last=False)
+
+    def invalidate_entity(self, entity):
+        if entity[GIZMO_ID]:
+            self.invalidate(*self.entity_key(entity))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+            self._generation += 1
+            self._floor = self._generation
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _freeze(value):
+    """a hashable stand in for a bound value"""
+    if isinstance(value, dict):
+        return frozenset((k, _freeze(v)) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    elif isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+
+    return value
+
+
+def _payload_size(value):
+    """approximate number of bytes held by a decoded result"""
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(_payload_size(k) + _payload_size(v)
+                    for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_payload_size(v) for v in value)
+
+    return size
+
+
+class QueryCache(object):
+    """cache of query results keyed by the canonical form of their script and
+    bindings. Traversals opt into it with Traversal.cached once the Mapper
+    has one:
+
+        mapper = Mapper(request, query_cache=QueryCache(max_bytes=2 ** 24))
+        users = await mapper.start(User).cached(ttl=5).to_collection()
+
+    bound params are renamed by the order they appear in the script, so the
+    same traversal built twice shares an entry even though gremlinpy names
+    its params differently every time. Entries expire after their ttl, the
+    least recently used ones are evicted once the results take more than
+    max_bytes and an entry is dropped when an entity with one of its tags,
+    the labels it was read from, is saved or deleted. Concurrent fetches of
+    the same key wait for the first one instead of querying again
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=60,
+                 clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._in_flight = {}
+        self._generation = 0
+        self._tag_generations = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(script, params=None):
+        params = params or {}
+
+        if not params:
+            return script, ()
+
+        order = []
+
+        def rename(match):
+            name = match.group()
+
+            if name not in order:
+                order.append(name)
+
+            return '{}_{}'.format(GIZMO_PARAM, order.index(name))
+
+        script = _debug_pattern(tuple(params)).sub(rename, script)
+
+        return script, tuple(_freeze(params[name]) for name in order)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] is not None and \
+                    entry[0] <= self.clock():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        return copy.deepcopy(entry[3])
+
+    def set(self, key, result, ttl=None, tags=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else self.clock() + ttl
+        size = _payload_size(result)
+        tags = frozenset(tags or ())
+
+        if size > self.max_bytes:
+            return
+
+        result = copy.deepcopy(result)
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (expires, size, tags, result)
+            self.size += size
+
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    async def fetch(self, key, load, ttl=None, tags=None):
+        """returns the cached result for key, calling the coroutine function
+        load to get and store it when there is none. The caller that loads
+        gets its own result back and every other caller a copy. A result
+        is not stored when its tags were invalidated while it loaded"""
+        result = self.get(key)
+
+        if result is not None:
+            return result
+
+        future = self._in_flight.get(key)
+
+        if future is not None:
+            self.shared += 1
+
+            try:
+                return copy.deepcopy(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                # only the caller that was loading got cancelled, this one
+                # tries again and loads it itself if nobody else is
+                if not future.cancelled():
+                    raise
+
+                return await self.fetch(key, load, ttl=ttl, tags=tags)
+
+        future = asyncio.get_event_loop().create_future()
+        self._in_flight[key] = future
+        generation = self._generations(tags)
+
+        try:
+            result = await load()
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                # retrieved so that a load nobody else waited on is not
+                # reported as never retrieved
+                future.exception()
+            else:
+                future.cancel()
+
+            raise
+        finally:
+            del self._in_flight[key]
+
+        future.set_result(result)
+
+        if generation == self._generations(tags):
+            self.set(key, result, ttl=ttl, tags=tags)
+
+        return result
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            self._remove(key)
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._tag_generations[tag] = \
+                    self._tag_generations.get(tag, 0) + 1
+
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+            self.size = 0
+
+    def _generations(self, tags):
+        """changes whenever an entry with one of the tags could have been
+        invalidated"""
+        with self._lock:
+            return self._generation, tuple(self._tag_generations.get(tag, 0)
+                                           for tag in tags or ())
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return
+
+        self.size -= entry[1]
+
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+
+            if keys is not None:
+                keys.discard(key)
+
+                if not keys:
+                    del self._tags[tag]
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared': self.shared,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'bytes': self.size,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
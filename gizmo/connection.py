@@ -1,32 +1,375 @@
 import asyncio
+import base64
+import collections
 import copy
+import decimal
 import json
 import logging
+import time
 import uuid
 
+from datetime import datetime, timezone
+
 import websockets
 
+from websockets.exceptions import ConnectionClosed
+
 from .exception import AstronomerConnectionException
-from .util import _query_debug, Timer
+from .util import _QueryDebug, Timer
 
 
 logger = logging.getLogger(__name__)
 
 
-class RequestQueryLogger:
+class JSONCodec:
+    """encodes request messages and decodes response frames with the
+    standard library's json module. A Request can be given any object that
+    has the same encode and decode methods
+    """
+
+    def encode(self, message):
+        return json.dumps(message)
+
+    def decode(self, frame):
+        return json.loads(frame)
+
+
+class OrjsonCodec(JSONCodec):
+    """codec backed by the optional orjson package"""
 
     def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            error = 'The orjson package is needed to use the OrjsonCodec'
+            logger.exception(error)
+            raise AstronomerConnectionException(error)
+
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def encode(self, message):
+        # the server expects text frames
+        return self._orjson.dumps(message, option=self._options).decode()
+
+    def decode(self, frame):
+        return self._orjson.loads(frame)
+
+
+class UJSONCodec(JSONCodec):
+    """codec backed by the optional ujson package"""
+
+    def __init__(self):
+        try:
+            import ujson
+        except ImportError:
+            error = 'The ujson package is needed to use the UJSONCodec'
+            logger.exception(error)
+            raise AstronomerConnectionException(error)
+
+        self._ujson = ujson
+
+    def encode(self, message):
+        return self._ujson.dumps(message)
+
+    def decode(self, frame):
+        return self._ujson.loads(frame)
+
+
+class GraphSONReader:
+    """turns GraphSON 2.0 and 3.0 typed values ({'@type': ..., '@value': ...})
+    into native python values once, when the frame is decoded. Vertices and
+    edges are read into the untyped layout that Response.translate and the
+    entities already understand. Types without a deserializer are replaced
+    by their value.
+
+    deserializers maps additional type names to functions that are called
+    with the reader and the type's value
+    """
+
+    def __init__(self, deserializers=None):
+        self.deserializers = {
+            'g:Int32': _read_int,
+            'g:Int64': _read_int,
+            'g:Float': _read_float,
+            'g:Double': _read_float,
+            'g:Date': _read_date,
+            'g:Timestamp': _read_date,
+            'g:UUID': _read_str,
+            'g:T': _read_str,
+            'g:Direction': _read_str,
+            'g:Class': _read_str,
+            'g:List': _read_list,
+            'g:Set': _read_list,
+            'g:Map': _read_map,
+            'g:BulkSet': _read_bulk_set,
+            'g:Traverser': _read_traverser,
+            'g:Vertex': _read_vertex,
+            'g:Edge': _read_edge,
+            'g:VertexProperty': _read_vertex_property,
+            'g:Property': _read_property,
+            'g:Path': _read_path,
+            'gx:Byte': _read_int,
+            'gx:Int16': _read_int,
+            'gx:BigInteger': _read_int,
+            'gx:BigDecimal': _read_decimal,
+            'gx:ByteBuffer': _read_bytes,
+        }
+
+        if deserializers:
+            self.deserializers.update(deserializers)
+
+    def read(self, value):
+        if isinstance(value, dict):
+            if '@type' in value and '@value' in value:
+                read = self.deserializers.get(value['@type'], None)
+
+                if read is None:
+                    return self.read(value['@value'])
+
+                return read(self, value['@value'])
+
+            return {k: self.read(v) for k, v in value.items()}
+        elif isinstance(value, list):
+            return [self.read(v) for v in value]
+
+        return value
+
+
+def _read_int(reader, value):
+    return int(value)
+
+
+def _read_float(reader, value):
+    return float(value)
+
+
+def _read_decimal(reader, value):
+    return decimal.Decimal(str(value))
+
+
+def _read_str(reader, value):
+    return str(value)
+
+
+def _read_date(reader, value):
+    return datetime.fromtimestamp(value / 1000.0, timezone.utc)
+
+
+def _read_bytes(reader, value):
+    return base64.b64decode(value)
+
+
+def _read_list(reader, value):
+    return [reader.read(v) for v in value]
+
+
+def _read_map(reader, value):
+    read = {}
+
+    for i in range(0, len(value), 2):
+        key = reader.read(value[i])
+
+        if isinstance(key, (dict, list)):
+            key = json.dumps(key, sort_keys=True, default=str)
+
+        read[key] = reader.read(value[i + 1])
+
+    return read
+
+
+def _read_bulk_set(reader, value):
+    read = []
+
+    for i in range(0, len(value), 2):
+        read += [reader.read(value[i])] * _read_int(reader,
+            reader.read(value[i + 1]))
+
+    return read
+
+
+def _read_traverser(reader, value):
+    return reader.read(value['value'])
+
+
+def _read_path(reader, value):
+    return {
+        'labels': reader.read(value.get('labels', [])),
+        'objects': reader.read(value.get('objects', [])),
+    }
+
+
+def _read_property(reader, value):
+    return {
+        'key': value.get('key', None),
+        'value': reader.read(value.get('value', None)),
+    }
+
+
+def _read_vertex_property(reader, value):
+    prop = {
+        'id': reader.read(value.get('id', None)),
+        'value': reader.read(value.get('value', None)),
+        'label': value.get('label', None),
+    }
+
+    if 'properties' in value:
+        prop['properties'] = {k: reader.read(v) for k, v in
+                              value['properties'].items()}
+
+    return prop
+
+
+def _read_vertex(reader, value):
+    vertex = {
+        'id': reader.read(value.get('id', None)),
+        'label': value.get('label', None),
+        'type': 'vertex',
+    }
+
+    if 'properties' in value:
+        vertex['properties'] = {k: [reader.read(p) for p in props]
+                                for k, props in value['properties'].items()}
+
+    return vertex
+
+
+def _read_edge(reader, value):
+    edge = {
+        'id': reader.read(value.get('id', None)),
+        'label': value.get('label', None),
+        'type': 'edge',
+        'inV': reader.read(value.get('inV', None)),
+        'outV': reader.read(value.get('outV', None)),
+        'inVLabel': value.get('inVLabel', None),
+        'outVLabel': value.get('outVLabel', None),
+    }
+
+    if 'properties' in value:
+        properties = {}
+
+        for k, prop in value['properties'].items():
+            prop = reader.read(prop)
+
+            if isinstance(prop, dict) and 'key' in prop:
+                prop = prop['value']
+
+            properties[k] = prop
+
+        edge['properties'] = properties
+
+    return edge
+
+
+class GraphSONCodec(JSONCodec):
+    """decodes frames with another codec and then reads the typed GraphSON
+    2.0/3.0 result with a GraphSONReader. Messages are encoded by the
+    wrapped codec unchanged
+    """
+
+    def __init__(self, codec=None, reader=None):
+        self.codec = codec or JSONCodec()
+        self.reader = reader or GraphSONReader()
+
+    def encode(self, message):
+        return self.codec.encode(message)
+
+    def decode(self, frame):
+        frame = self.codec.decode(frame)
+        result = frame.get('result', None)
+
+        if isinstance(result, dict):
+            result['data'] = self.reader.read(result.get('data', None))
+            result['meta'] = self.reader.read(result.get('meta', None))
+
+        return frame
+
+
+REQUEST_PHASES = ('acquire', 'serialize', 'round_trip', 'server', 'decode',
+                  'translate', 'hydrate')
+
+
+def _elapsed(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def _request_timings():
+    timings = {phase: 0.0 for phase in REQUEST_PHASES}
+    timings['server'] = None
+
+    return timings
+
+
+def _percentile(values, percentile):
+    """linear interpolation between the closest ranks of sorted values"""
+    rank = (len(values) - 1) * percentile / 100.0
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class RequestQueryLogger:
+    """records every query sent through a Request along with how long each
+    phase of it took, in milliseconds:
+
+        acquire     getting a connection from the pool or multiplexer
+        serialize   encoding the message
+        round_trip  from the message being sent to the last frame arriving,
+                    without the time spent decoding frames
+        server      the execution time reported by the server, if any
+        decode      decoding the response frames
+        translate   building the Response and hydrating update entities
+        hydrate     creating the entities of the resulting Collection
+
+    server_time_attributes are the status attributes a server may report
+    its own execution time under. Gremlin Server itself does not report one
+    """
+
+    def __init__(self, server_time_attributes=None):
         self.queries = []
+        self.server_time_attributes = server_time_attributes or \
+            ('x-ms-total-server-time-ms', )
 
-    def add(self, script, params, query, execution_time):
+    def add(self, script, params, query, execution_time, timings=None):
         self.queries.append({
-            'query': query,
+            'query': str(query),
             'script': script,
             'params': params,
-            'query': query,
             'execution_time': execution_time,
+            'timings': timings if timings is not None else {},
         })
 
+    def server_time(self, status):
+        attributes = getattr(status, 'attributes', None) or {}
+
+        for name in self.server_time_attributes:
+            if attributes.get(name, None) is not None:
+                return float(attributes[name])
+
+        return None
+
+    def percentiles(self, phase='execution_time', percentiles=(50, 95, 99)):
+        """the percentiles of a phase, or of the whole execution time,
+        across the recorded queries"""
+        if phase == 'execution_time':
+            values = [q['execution_time'] for q in self.queries]
+        else:
+            values = [q['timings'].get(phase, None) for q in self.queries]
+
+        values = sorted(v for v in values if v is not None)
+
+        if not values:
+            return {p: None for p in percentiles}
+
+        return {p: _percentile(values, p) for p in percentiles}
+
+    def summary(self, percentiles=(50, 95, 99)):
+        phases = ('execution_time', ) + REQUEST_PHASES
+
+        return {phase: self.percentiles(phase, percentiles)
+                for phase in phases}
+
     def reset(self):
         self.queries = []
 
@@ -42,10 +385,519 @@ class RequestQueryLogger:
             self.queries += copy.deepcopy(other.queries)
 
 
+class ConnectionPool:
+    """bounded, asyncio-aware pool of websocket connections. Connections are
+    opened lazily (after the first min_size are created), handed out LIFO so
+    that idle connections age out, pinged before reuse if they have been idle
+    longer than ping_interval seconds, and closed once they have been idle
+    longer than idle_timeout seconds while the pool holds more than min_size
+    connections.
+
+    connect is a coroutine function that returns a new websocket connection
+    """
+
+    def __init__(self, connect, min_size=0, max_size=10, idle_timeout=60,
+                 ping_interval=30, ping_timeout=5):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            error = ('The pool needs a max_size of at least 1 and a min_size'
+                     ' between 0 and max_size')
+            logger.exception(error)
+            raise AstronomerConnectionException(error)
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self._free = collections.deque()
+        self._waiters = collections.deque()
+        self._size = 0
+        self._filled = False
+        self.closed = False
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle(self):
+        return len(self._free)
+
+    async def fill(self):
+        """opens connections until the pool holds at least min_size"""
+        self._filled = True
+
+        while self._size < self.min_size:
+            self._size += 1
+
+            try:
+                ws = await self._connect()
+            except:
+                self._size -= 1
+                raise
+
+            self._free.appendleft((ws, time.monotonic()))
+
+        return self
+
+    async def acquire(self):
+        if self.closed:
+            error = 'The connection pool has been closed'
+            logger.exception(error)
+            raise AstronomerConnectionException(error)
+
+        if not self._filled:
+            await self.fill()
+
+        while True:
+            await self._prune()
+
+            while self._free:
+                ws, last_used = self._free.pop()
+                idle = time.monotonic() - last_used
+
+                if idle < self.ping_interval or await self._is_healthy(ws):
+                    return ws
+
+                await self._discard(ws)
+
+            if self._size < self.max_size:
+                self._size += 1
+
+                try:
+                    return await self._connect()
+                except:
+                    self._size -= 1
+                    self._wake()
+                    raise
+
+            waiter = asyncio.get_event_loop().create_future()
+            self._waiters.append(waiter)
+
+            try:
+                await waiter
+            except:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # woken and cancelled before it could run, the wakeup
+                    # goes to the next waiter instead of being lost
+                    self._wake()
+                raise
+
+    async def release(self, ws, discard=False):
+        """returns a borrowed connection to the pool. Connections that
+        errored out should be discarded so that the next borrower gets a
+        fresh one"""
+        if discard or self.closed:
+            await self._discard(ws)
+        else:
+            self._free.append((ws, time.monotonic()))
+            self._wake()
+
+    def connection(self):
+        """async context manager used to borrow a connection
+
+            async with pool.connection() as ws:
+                await ws.send(message)
+        """
+        return _PooledConnection(self)
+
+    async def close(self):
+        self.closed = True
+
+        while self._free:
+            ws, _ = self._free.pop()
+
+            await self._discard(ws)
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_exception(AstronomerConnectionException(
+                    'The connection pool has been closed'))
+
+    async def _prune(self):
+        now = time.monotonic()
+
+        while self._free and self._size > self.min_size:
+            ws, last_used = self._free[0]
+
+            if now - last_used < self.idle_timeout:
+                break
+
+            self._free.popleft()
+            await self._discard(ws)
+
+    async def _is_healthy(self, ws):
+        try:
+            pong = await ws.ping()
+            await asyncio.wait_for(pong, self.ping_timeout)
+
+            return True
+        except Exception:
+            return False
+
+    async def _discard(self, ws):
+        self._size -= 1
+
+        try:
+            await ws.close()
+        except Exception:
+            pass
+
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+
+class _PooledConnection:
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.ws = None
+
+    async def __aenter__(self):
+        self.ws = await self.pool.acquire()
+
+        return self.ws
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.pool.release(self.ws, discard=exc_type is not None)
+
+
+class MultiplexedConnection:
+    """single long-lived websocket shared by many coroutines at once. Every
+    message is written as soon as it is ready and a background reader task
+    routes the response frames back to the waiting coroutine by the message's
+    requestId, so a slow query does not hold up the ones sent after it.
+
+    If the socket dies, every in-flight request fails and the next request
+    transparently opens a new socket
+    """
+
+    def __init__(self, connect, codec=None):
+        self._connect = connect
+        self.codec = codec or JSONCodec()
+        self._ws = None
+        self._reader = None
+        self._lock = None
+        self._pending = {}
+        self._timings = {}
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    async def _ensure_connection(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._ws is None:
+                self._ws = await self._connect()
+                self._reader = asyncio.ensure_future(self._read(self._ws))
+
+        return self._ws
+
+    async def open(self, request_id, message, timings=None):
+        """sends the message and returns the queue that the frames for its
+        request_id will be put on. The queue is unbounded because the reader
+        cannot stop reading the shared socket for a single slow consumer.
+        When a timings dict is given, the time spent getting the connection
+        and decoding the frames is added to it"""
+        start = time.perf_counter()
+        ws = await self._ensure_connection()
+        frames = asyncio.Queue()
+        self._pending[request_id] = frames
+
+        if timings is not None:
+            timings['acquire'] += _elapsed(start)
+            self._timings[request_id] = timings
+
+        try:
+            await ws.send(message)
+        except:
+            self.finish(request_id)
+            raise
+
+        return frames
+
+    def finish(self, request_id):
+        """stops routing frames to the request_id. Frames that arrive for it
+        afterwards are dropped"""
+        self._pending.pop(request_id, None)
+        self._timings.pop(request_id, None)
+
+    async def _read(self, ws):
+        try:
+            while True:
+                raw = await ws.recv()
+                start = time.perf_counter()
+                frame = self.codec.decode(raw)
+                timings = self._timings.get(frame.get('requestId'), None)
+
+                if timings is not None:
+                    timings['decode'] += _elapsed(start)
+
+                frames = self._pending.get(frame.get('requestId'))
+
+                if frames is None:
+                    logger.debug('Dropping frame for unknown request: {}'.format(
+                        frame.get('requestId')))
+                    continue
+
+                frames.put_nowait(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._fail(ws, e)
+
+    async def _fail(self, ws, error):
+        if self._ws is ws:
+            self._ws = None
+            self._reader = None
+
+        for frames in list(self._pending.values()):
+            frames.put_nowait(AstronomerConnectionException(error))
+
+        # the dead socket is closed here rather than left for the garbage
+        # collector, the requests waiting on it have already been failed
+        try:
+            await ws.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        ws, reader = self._ws, self._reader
+        self._ws = self._reader = None
+
+        if reader is not None:
+            reader.cancel()
+
+        if ws is not None:
+            await ws.close()
+
+        for frames in list(self._pending.values()):
+            frames.put_nowait(AstronomerConnectionException(
+                'The connection has been closed'))
+
+
+def _entity_properties(arg):
+    """flattens a vertex or edge from the result into entity data"""
+    # the property lists are shared with the raw result rather than copied,
+    # hydration only reads them
+    props = {k: v for k, v in arg.items() if k != 'properties'}
+
+    if 'properties' in arg:
+        props.update(arg['properties'])
+
+    props.update({
+        'id': arg.get('id'),
+        'type': arg.get('type'),
+        'label': arg.get('label'),
+    })
+
+    return props
+
+
+def _is_final(frame):
+    """Gremlin Server sends large results as a series of 206 (partial content)
+    frames followed by a single terminal frame"""
+    return (frame.get('status') or {}).get('code') != 206
+
+
+class _FrameReader:
+    """reads the response frames for a single message one at a time, either
+    from a connection borrowed from the pool or from the multiplexer. A pooled
+    connection is handed back once the terminal frame is read; if the reader
+    is closed before then the connection still has unread frames on it and is
+    thrown away"""
+
+    def __init__(self, request, request_id, message, timings=None):
+        self.request = request
+        self.request_id = request_id
+        self.message = message
+        self.timings = timings
+        self.done = False
+        self._sent = None
+        self._started = False
+        self._ws = None
+        self._frames = None
+
+    async def _start(self):
+        self._started = True
+        multiplexer = self.request.multiplexer
+
+        if multiplexer is not None:
+            self._frames = await multiplexer.open(self.request_id,
+                                                  self.message,
+                                                  timings=self.timings)
+        else:
+            self._ws = await self._send_pooled()
+
+        self._sent = time.perf_counter()
+
+    async def _send_pooled(self):
+        """If a reused connection turns out to be dead before the message
+        could be sent, it is thrown away and the message is sent over a new
+        connection"""
+        pool = self.request.pool
+
+        for attempt in range(2):
+            start = time.perf_counter()
+            ws = await pool.acquire()
+
+            if self.timings is not None:
+                self.timings['acquire'] += _elapsed(start)
+
+            try:
+                await ws.send(self.message)
+
+                return ws
+            except ConnectionClosed:
+                await pool.release(ws, discard=True)
+
+                if attempt:
+                    raise
+            except:
+                await pool.release(ws, discard=True)
+                raise
+
+    async def next(self):
+        """returns the next decoded frame or None once the terminal frame has
+        been read"""
+        if self.done:
+            return None
+
+        if not self._started:
+            await self._start()
+
+        try:
+            if self._frames is not None:
+                frame = await self._frames.get()
+
+                if isinstance(frame, Exception):
+                    raise frame
+            else:
+                raw = await self._ws.recv()
+                start = time.perf_counter()
+                frame = self.request.codec.decode(raw)
+
+                if self.timings is not None:
+                    self.timings['decode'] += _elapsed(start)
+        except:
+            await self.close()
+            raise
+
+        if _is_final(frame):
+            if self.timings is not None:
+                self.timings['round_trip'] = _elapsed(self._sent) - \
+                    self.timings['decode']
+
+            await self._finish()
+
+        return frame
+
+    async def _finish(self):
+        self.done = True
+
+        if self._ws is not None:
+            ws, self._ws = self._ws, None
+            await self.request.pool.release(ws)
+
+        if self._frames is not None:
+            self.request.multiplexer.finish(self.request_id)
+
+    async def close(self):
+        if self.done:
+            return
+
+        self.done = True
+
+        if self._ws is not None:
+            ws, self._ws = self._ws, None
+            await self.request.pool.release(ws, discard=True)
+
+        if self._frames is not None:
+            self.request.multiplexer.finish(self.request_id)
+
+
+class ResponseStream:
+    """async iterator over a response as it arrives from the server. Every
+    frame is returned as its own Response so that large results can be
+    consumed one batch at a time:
+
+        stream = request.stream(script='g.V()')
+
+        async for batch in stream:
+            for vertex in batch.data:
+                ...
+
+    When iteration is abandoned early, close the stream (or use it as an
+    async context manager) so that the underlying connection is not reused
+    with frames still pending on it
+    """
+
+    def __init__(self, request, reader, script=None, params=None,
+                 update_entities=None):
+        self.request = request
+        self.reader = reader
+        self.script = script
+        self.params = params
+        self.update_entities = update_entities or {}
+        self.status = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            try:
+                frame = await self.reader.next()
+            except Exception as e:
+                raise AstronomerConnectionException(e)
+
+            if frame is None:
+                raise StopAsyncIteration()
+
+            if frame.get('status'):
+                self.status = ResponseStatus(**frame['status'])
+
+            if self.status and self.status.code == 204:
+                continue
+
+            return Response(request_id=frame.get('requestId'),
+                            result=frame.get('result'),
+                            update_entities=self.update_entities,
+                            script=self.script, params=self.params,
+                            status=self.status, copy_on_write=True)
+
+    async def close(self):
+        await self.reader.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
 class Request:
 
     def __init__(self, uri, port=8182, three_two=True, username=None,
-                 password=None, log_requests=None):
+                 password=None, log_requests=None, pool_min_size=0,
+                 pool_max_size=10, pool_idle_timeout=60,
+                 pool_ping_interval=30, pool_ping_timeout=5, multiplex=False,
+                 codec=None):
         gremlin = '/gremlin' if three_two else ''
         self.uri = uri
         self.port = port
@@ -53,18 +905,42 @@ class Request:
         self._ws_uri = 'ws://{}:{}{}'.format(uri, port, gremlin)
         self.username = username
         self.password = password
-        self.connection = None
+        self.codec = codec or JSONCodec()
+        self.pool = ConnectionPool(self.connect, min_size=pool_min_size,
+                                   max_size=pool_max_size,
+                                   idle_timeout=pool_idle_timeout,
+                                   ping_interval=pool_ping_interval,
+                                   ping_timeout=pool_ping_timeout)
+        self.multiplexer = None
+
+        if multiplex:
+            self.multiplexer = MultiplexedConnection(self.connect,
+                                                     codec=self.codec)
 
         if log_requests:
             log_requests = RequestQueryLogger()
 
         self.request_logger = log_requests
 
-    def connect(self):
-        self.connection = websockets.connect(self._ws_uri)
+    async def connect(self):
+        return await websockets.connect(self._ws_uri)
+
+    async def close(self):
+        if self.multiplexer is not None:
+            await self.multiplexer.close()
+
+        await self.pool.close()
 
     def message(self, script, params=None, rebindings=None, op='eval',
                 processor=None, language='gremlin-groovy', session=None):
+        message = self._message(script=script, params=params,
+            rebindings=rebindings, op=op, processor=processor,
+                language=language, session=session)
+
+        return self.codec.encode(message)
+
+    def _message(self, script, params=None, rebindings=None, op='eval',
+                 processor=None, language='gremlin-groovy', session=None):
         message = {
             'requestId': str(uuid.uuid4()),
             'op': op,
@@ -79,7 +955,36 @@ class Request:
 
         # TODO: add session
 
-        return json.dumps(message)
+        return message
+
+    def _reader(self, script, params=None, rebindings=None, op='eval',
+                processor=None, language='gremlin-groovy', session=None,
+                timings=None):
+        message = self._message(script=script, params=params,
+            rebindings=rebindings, op=op, processor=processor,
+                language=language, session=session)
+        start = time.perf_counter()
+        encoded = self.codec.encode(message)
+
+        if timings is not None:
+            timings['serialize'] += _elapsed(start)
+
+        return _FrameReader(self, message['requestId'], encoded,
+                            timings=timings)
+
+    def stream(self, script=None, params=None, update_entities=None,
+               rebindings=None, op='eval', processor=None,
+               language='gremlin-groovy', session=None):
+        """returns a ResponseStream that yields a Response for every frame
+        of the result as it is read from the server instead of waiting for
+        the whole result"""
+        params = params or {}
+        reader = self._reader(script=script, params=params,
+            rebindings=rebindings, op=op, processor=processor,
+                language=language, session=session)
+
+        return ResponseStream(self, reader, script=script, params=params,
+                              update_entities=update_entities)
 
     async def send(self, script=None, params=None, update_entities=None,
                    rebindings=None, op='eval', processor=None,
@@ -90,8 +995,12 @@ class Request:
         result = None
         params = params  or {}
         update_entities = update_entities or {}
-        query = _query_debug(script, params)
+        query = _QueryDebug(script, params)
         request_logger = self.request_logger
+        timings = None
+
+        if request_logger is not None:
+            timings = _request_timings()
 
         logger.debug('RUNNING QUERY WITH PARAMS')
         logger.debug(script)
@@ -100,35 +1009,50 @@ class Request:
 
         try:
             with Timer() as timer:
-                self.connect()
+                reader = self._reader(script=script, params=params,
+                    rebindings=rebindings, op=op, processor=processor,
+                        language=language, session=session, timings=timings)
 
-                async with self.connection as ws:
-                    message = self.message(script=script, params=params,
-                        rebindings=rebindings, op=op, processor=processor,
-                            language=language, session=session)
+                while True:
+                    data = await reader.next()
 
-                    await ws.send(message)
+                    if data is None:
+                        break
 
-                    response = await ws.recv()
-                    data = json.loads(response)
-
-                    if data.get('request_id'):
-                        request_id = data['request_id']
+                    if data.get('requestId'):
+                        request_id = data['requestId']
 
                     if data.get('result'):
-                        result = data['result']
+                        if result is None:
+                            result = data['result']
+                        else:
+                            if result.get('data') is None:
+                                result['data'] = []
+
+                            # extended in place, rebuilding the list for
+                            # every partial frame is quadratic
+                            result['data'].extend(
+                                data['result'].get('data') or [])
 
                     if data.get('status'):
                         status = ResponseStatus(**data['status'])
 
             logger.debug('runtime: {} miliseconds\n'.format(timer.elapsed))
+            start = time.perf_counter()
+            response = Response(request_id=request_id, result=result,
+                                update_entities=update_entities,
+                                script=script, params=params, status=status,
+                                copy_on_write=True)
 
             if request_logger is not None:
-                request_logger.add(script, params, query, timer.elapsed)
+                timings['translate'] = _elapsed(start)
+                timings['server'] = request_logger.server_time(status)
+                response.timings = timings
 
-            return Response(request_id=request_id, result=result,
-                            update_entities=update_entities, script=script,
-                            params=params)
+                request_logger.add(script, params, query, timer.elapsed,
+                                   timings)
+
+            return response
         except Exception as e:
             raise AstronomerConnectionException(e)
 
@@ -142,17 +1066,62 @@ class ResponseStatus:
 
 
 class Response:
+    """The translated result is computed once and cached until the result is
+    replaced, a member is set, or invalidate is called.
+
+    Reading a member returns a deep copy of it unless the response is
+    copy_on_write. In that mode reads hand out the cached members themselves
+    and only writes copy, so callers must copy a member before changing it.
+    Request builds its responses this way because Collection hands their
+    members to entities, which copy the data they are hydrated with
+    """
 
     def __init__(self, request_id=None, result=None, update_entities=None,
-                 script=None, params=None, status=None):
+                 script=None, params=None, status=None, copy_on_write=False):
         self.request_id = request_id
-        self.result = result or {}
         self.update_entities = update_entities or {}
         self.script = script
         self.params = params
         self.status = status
+        self.copy_on_write = copy_on_write
+        self.timings = None
+        self.result = result
+        self._data = self.translate()
 
-        self.translate()
+    def _get_result(self):
+        return self._result
+
+    def _set_result(self, result):
+        self._result = result or {}
+        self._data = None
+        self._owned = False
+
+    result = property(_get_result, _set_result)
+
+    def invalidate(self):
+        """drops the cached translation. Needed only when the result is
+        changed in place"""
+        self._data = None
+        self._owned = False
+
+        return self
+
+    @classmethod
+    def merge(cls, responses):
+        """combines the responses of a script that was sent in several
+        parts. The translated data of every part is kept as is, so the
+        entities they updated are not hydrated again"""
+        responses = [r for r in responses if r is not None]
+        status = responses[-1].status if responses else None
+        merged = cls(status=status, copy_on_write=True)
+        merged._result = {'data': [d for r in responses
+            for d in (r.result.get('data') or [])]}
+        merged._data = [d for r in responses for d in r.data]
+
+        if len(responses) == 1:
+            merged.timings = responses[0].timings
+
+        return merged
 
     def _fix_titan_data(self, data):
         """temp method to address a titan bug where it returns maps in a
@@ -185,21 +1154,6 @@ class Response:
 
             return False
 
-        def fix_properties(arg):
-            props = copy.deepcopy(arg)
-
-            if 'properties' in arg:
-                props.update(arg['properties'])
-                del(props['properties'])
-
-            props.update({
-                'id': arg.get('id'),
-                'type': arg.get('type'),
-                'label': arg.get('label'),
-            })
-
-            return props
-
         for arg in data:
             if not hasattr(arg, '__iter__'):
                 response = [{'response': arg}]
@@ -208,12 +1162,22 @@ class Response:
                     for k, v in arg.items():
                         if k in self.update_entities:
                             entity = self.update_entities[k]
-                            props = fix_properties(v)
 
-                            response.append(props)
-                            entity.empty().hydrate(props, reset_initial=True)
+                            # bulk saves bind a list of entities to a single
+                            # variable and get a list of results back
+                            if isinstance(entity, (list, tuple)):
+                                pairs = zip(entity, v)
+                            else:
+                                pairs = [(entity, v)]
+
+                            for entity, v in pairs:
+                                props = _entity_properties(v)
+
+                                response.append(props)
+                                entity.empty().hydrate(props,
+                                                       reset_initial=True)
                 else:
-                    response.append(fix_properties(arg))
+                    response.append(_entity_properties(arg))
             else:
                 response.append(arg)
 
@@ -221,14 +1185,17 @@ class Response:
 
     @property
     def data(self):
-        return self.translate()
+        if self._data is None:
+            self._data = self.translate()
+
+        return self._data
 
     def __getitem__(self, key):
         val = None
 
         try:
             data = self.data[key]
-            val = copy.deepcopy(data)
+            val = data if self.copy_on_write else copy.deepcopy(data)
             #
             # if '_properties' in data:
             #     del val['_properties']
@@ -257,6 +1224,12 @@ class Response:
         return self
 
     def __setitem__(self, key, val):
+        # the list is copied on the first write only, later writes go to
+        # the copy this response owns
+        if self.copy_on_write and not self._owned:
+            self._data = list(self.data)
+            self._owned = True
+
         self.data[key] = val
 
         return self
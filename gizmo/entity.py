@@ -10,69 +10,49 @@ from .util import (camel_to_underscore, entity_name, GIZMO_ID, GIZMO_LABEL,
 ENTITY_MAP = {}
 
 
+class _EntitySchema:
+    """the fields of an entity class resolved once. Every instance is
+    built from clones of these prototypes
+    """
+
+    def __init__(self, fields, allow_undefined=False):
+        self.fields = fields
+        self.allow_undefined = allow_undefined
+
+    def build(self):
+        return {name: field._clone() for name, field in self.fields.items()}
+
+
 class _EntityType(type):
 
     def __new__(cls, name, bases, attrs):
 
-        def __init__(self, data=None, data_type='python'):
+        def __init__(self, data=None, data_type='python', snapshot=True):
+            data = data or {}
 
+            # the end points are kept as they are, they may be entities
             if isinstance(self, Edge):
-                if data and 'outV' in data:
-                    self.outV = data['outV']
+                self.outV = data.get('outV', None)
+                self.inV = data.get('inV', None)
+                data = {k: v for k, v in data.items()
+                        if k not in ('outV', 'inV')}
 
-                    del data['outV']
-                else:
-                    self.outV = None
+            if snapshot:
+                data = copy.deepcopy(data)
+            else:
+                data = dict(data)
 
-                if data and 'inV' in data:
-                    self.inV = data['inV']
-
-                    del data['inV']
-                else:
-                    self.inV = None
-
-            data = copy.deepcopy(data or {})
-            fields = {}
-            _all_attrs = {}
+            schema = self.__class__._entity_schema()
             self._data_type = data_type
-
-            def def_fields(obj_attrs):
-                keys = obj_attrs.keys()
-
-                for key, val in obj_attrs.items():
-                    if isinstance(val, Field):
-                        fields[key] = copy.deepcopy(val)
-
-                        if not fields[key].name:
-                            fields[key].name = key
-
-            def walk(bases):
-                for base in bases:
-                    _all_attrs.update(base.__dict__)
-                    walk(base.__bases__)
-
-            walk(bases)
-            def_fields(_all_attrs)
-            def_fields(attrs)
-            _all_attrs.update(attrs)
-
-            ast_entity = entity_name(self)
-            allow_undefined = _all_attrs.get('allow_undefined', False)
-            label = attrs.get('label', str(self))
-            _id = attrs.get('id', attrs.get('_id', None))
-            _type = 'vertex' if isinstance(self, Vertex) else 'edge'
-            fields[GIZMO_LABEL[0]] = GremlinLabel(GIZMO_LABEL[1], values=label)
-            fields[GIZMO_ID] = GremlinID(GIZMO_ID, values=_id)
-            fields[GIZMO_TYPE] = GremlinType(GIZMO_TYPE, values=_type)
-            fields[GIZMO_ENTITY] = GIZMOEntity(GIZMO_ENTITY, values=ast_entity)
-            self.fields = FieldManager(fields=fields,
-                                       allow_undefined=allow_undefined,
-                                       data_type=data_type)
+            self.fields = FieldManager(fields=schema.build(),
+                                       allow_undefined=schema.allow_undefined,
+                                       data_type=data_type, snapshot=snapshot)
 
             if GIZMO_LABEL[0] in data:
                 del data[GIZMO_LABEL[0]]
 
             self.hydrate(data, True)
+            self.__dict__.update(self.fields.fields)
 
         attrs['__init__'] = __init__
         cls = type.__new__(cls, name, bases, attrs)
@@ -81,13 +61,46 @@ class _EntityType(type):
 
         return cls
 
-    def __call__(cls, *args, **kwargs):
-        entity = super(_EntityType, cls).__call__(*args, **kwargs)
+    def _entity_schema(cls):
+        """the class' field schema, compiled the first time it is needed"""
+        schema = cls.__dict__.get('_schema', None)
+
+        if schema is None:
+            schema = cls._schema = cls._compile_schema()
+
+        return schema
+
+    def _compile_schema(cls):
+        fields = {}
+        attrs = cls.__dict__
+        _all_attrs = {}
+
+        def walk(bases):
+            for base in bases:
+                _all_attrs.update(base.__dict__)
+                walk(base.__bases__)
+
+        walk(cls.__bases__)
+        _all_attrs.update(attrs)
+
+        for key, val in _all_attrs.items():
+            if isinstance(val, Field):
+                fields[key] = val._clone()
+
+                if not fields[key].name:
+                    fields[key].name = key
 
-        for k, v in entity.fields.fields.items():
-            setattr(entity, k, v)
+        label = attrs.get('label', str(cls))
+        _id = attrs.get('id', attrs.get('_id', None))
+        _type = 'vertex' if issubclass(cls, Vertex) else 'edge'
+        fields[GIZMO_LABEL[0]] = GremlinLabel(GIZMO_LABEL[1], values=label)
+        fields[GIZMO_ID] = GremlinID(GIZMO_ID, values=_id)
+        fields[GIZMO_TYPE] = GremlinType(GIZMO_TYPE, values=_type)
+        fields[GIZMO_ENTITY] = GIZMOEntity(GIZMO_ENTITY,
+                                           values=entity_name(cls))
 
-        return entity
+        return _EntitySchema(fields=fields,
+            allow_undefined=_all_attrs.get('allow_undefined', False))
 
     def __str__(cls):
         return camel_to_underscore(cls.__name__)
@@ -1,5 +1,6 @@
 import copy
 import json
+import types
 
 from collections import OrderedDict
 from datetime import datetime
@@ -7,17 +8,109 @@ from datetime import datetime
 from .util import is_gremlin_entity
 
 
-class FieldManager:
+_ATOMIC_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+
+def _copy_value(value):
+    if isinstance(value, _ATOMIC_TYPES):
+        return value
+
+    return copy.deepcopy(value)
+
+
+_SLOT_NAMES = {}
+
+
+def _slot_names(cls):
+    try:
+        return _SLOT_NAMES[cls]
+    except KeyError:
+        names = []
+
+        for klass in cls.__mro__:
+            for name in klass.__dict__.get('__slots__', ()):
+                if name not in names and \
+                        name not in ('__dict__', '__weakref__'):
+                    names.append(name)
+
+        _SLOT_NAMES[cls] = names
+
+        return names
+
+
+def _copy_state(source, target):
+    for name in _slot_names(source.__class__):
+        try:
+            setattr(target, name, getattr(source, name))
+        except AttributeError:
+            pass
 
-    def __init__(self, fields=None, data_type='python', allow_undefined=False):
+    if hasattr(source, '__dict__'):
+        target.__dict__.update(source.__dict__)
+
+    return target
+
+
+def _is_graphson_property(value):
+    """checks for the [{'id', 'value', 'properties'}] lists that GraphSON
+    uses for vertex properties"""
+    return isinstance(value, list) and len(value) > 0 and \
+        isinstance(value[0], dict) and 'value' in value[0]
+
+
+def _identity(value):
+    return value
+
+
+def _can_always_set(value):
+    return True
+
+
+def _raw_value(value):
+    return value._value
+
+
+def _rebind(method, source, target):
+    """point a method bound to source at target instead"""
+    if getattr(method, '__self__', None) is source:
+        return types.MethodType(method.__func__, target)
+
+    return method
+
+
+class FieldManager:
+    """the fields of an entity. Fields report themselves dirty as their
+    values or their properties are added, removed or set, so building the
+    changes only visits those fields, the immutable ones and the few
+    holding mutable values that could be changed in place
+    """
+
+    def __init__(self, fields=None, data_type='python', allow_undefined=False,
+                 snapshot=True):
         self.fields = fields or {}
         self._data_type = data_type
         self.allow_undefined = allow_undefined
+        self.snapshot = snapshot
+        self._dirty = {}
 
         for name, field in self.fields.items():
             if not field.name:
                 field.name = name
 
+            if not snapshot:
+                field._values.snapshot = False
+
+            self._track(name, field)
+
+    def _track(self, name, field):
+        values = field._values
+        values._tracker = self._dirty
+        values._name = name
+
+        if field.immutable or field.deleted or values._dirty or \
+                values._watched():
+            self._dirty[name] = True
+
     def _set_data_type(self, data_type):
         for name, field in self.fields.items():
             field.data_type = data_type
@@ -47,6 +140,8 @@ class FieldManager:
         if name in self.fields:
             if isinstance(value, Field):
                 self.fields[name] = value
+                self._track(name, value)
+                self._dirty[name] = True
             else:
                 field = self.fields[name].empty()
                 field + value
@@ -60,12 +155,13 @@ class FieldManager:
 
     def __delitem__(self, name):
         self.fields[name].deleted = True
+        self._dirty[name] = True
 
     def _add_undefined_field(self, name, value):
         max_values = None
         overwrite_last_value = False
         gremlin_entity = is_gremlin_entity(value)
-        original_value = copy.deepcopy(value)
+        original_value = value
 
         if gremlin_entity:
             value = value[0]['value']
@@ -95,15 +191,13 @@ class FieldManager:
         """
         f = field(name=name, data_type=self.data_type, max_values=max_values,
                   overwrite_last_value=overwrite_last_value)
+        f._values.snapshot = self.snapshot
+        self._track(name, f)
 
         # if isinstance(value, (list, tuple)) and len(value) and \
         #     isinstance(value[0], dict) and 'value' in value[0]:
         if gremlin_entity:
-            for val in original_value:
-                val_obj = Value(value=val.get('value', None),
-                    properties=val.get('properties', None), id=val.get('id',
-                        None))
-                f + val_obj
+            f._values.add_graphson(original_value)
         else:
             f + value
 
@@ -112,17 +206,18 @@ class FieldManager:
         return self.fields[name]
 
     def hydrate(self, data, reset_initial=False):
+        fields = self.fields
+
         for key, val in data.items():
-            if key in self.fields:
-                if is_gremlin_entity(val):
-                    for v in val:
-                        self.fields[key] + Value(value=v.get('value', None),
-                            properties=v.get('properties', None),
-                            id=v.get('id', None))
-                else:
-                    self.fields[key] + val
-            elif self.allow_undefined:
-                self._add_undefined_field(key, val)
+            field = fields.get(key, None)
+
+            if field is None:
+                if self.allow_undefined:
+                    self._add_undefined_field(key, val)
+            elif _is_graphson_property(val):
+                field._values.add_graphson(val)
+            else:
+                field + val
 
         return self
 
@@ -146,25 +241,43 @@ class FieldManager:
 
         return OrderedDict(sorted(values.items()))
 
+    def _changed_fields(self):
+        fields = self.fields
+
+        return [fields[name] for name in self._dirty]
+
     @property
     def changes(self):
-        changes = {field.name: field.changes for name, field in
-                    self.fields.items() if field.changes}
+        """the changes of the dirty and the immutable fields"""
+        changes = {field.name: field.changes for field in
+                   self._changed_fields()
+                   if field.immutable or field.dirty}
 
         return OrderedDict(sorted(changes.items()))
 
     @property
     def changed(self):
-        return [name for name, changes in self.changes.items() if
-            changes['deleted'] or changes['values']]
+        # every field, dirty lists the ones that changed
+        return sorted(field.name for name, field in self.fields.items())
+
+    @property
+    def dirty(self):
+        """the names of the fields that were deleted or whose values were
+        added, removed or modified since they were hydrated"""
+        return sorted(field.name for field in self._changed_fields()
+                      if field.dirty)
 
     @property
     def deleted(self):
-        return [name for name, changes in self.changes.items() if
-            changes['deleted']]
+        fields = self.fields
+
+        return sorted(fields[name].name for name in self._dirty
+                      if fields[name].deleted)
 
 
 class Field:
+    __slots__ = ('name', 'immutable', 'default', '_values', '_data_type',
+                 'deleted')
 
     def __init__(self, name=None, values=None, data_type='python',
                  max_values=None, overwrite_last_value=False,
@@ -189,6 +302,7 @@ class Field:
     def __setitem__(self, key, value):
         val = self[key]
         val[key] = value
+        self._values._mark_dirty()
 
     def __delitem__(self, value):
         if self.can_set(value):
@@ -224,10 +338,19 @@ class Field:
     def properties(self):
         return self._values.properties
 
+    @property
+    def dirty(self):
+        return self.deleted or self._values.dirty
+
     @property
     def changes(self):
+        if self.dirty:
+            values = self._values.changes
+        else:
+            values = {'values': self._values.values}
+
         return {
-            'values': self._values.changes,
+            'values': values,
             'deleted': self.deleted,
             'immutable': self.immutable,
         }
@@ -250,14 +373,32 @@ class Field:
     def can_set(self, value):
         return True
 
+    def _clone(self):
+        """an independent copy of this field used in place of
+        copy.deepcopy when entities are built from their class schema.
+        Values are copied, any other field state is shared"""
+        field = _copy_state(self, object.__new__(self.__class__))
+        field._values = self._values._clone(self, field)
+
+        return field
+
 
 class ValueManager:
+    __slots__ = ('_values', '_deleted', '_data_type', 'default', 'max_values',
+                 'overwrite_last_value', '_to_python', '_to_graph',
+                 '_can_set', 'filter_field', 'snapshot', '_dirty',
+                 '_tracker', '_name')
 
     def __init__(self, values=None, data_type='python', reset_initial=True,
                  to_python=None, to_graph=None, filter_field=None,
                  default_value=None, max_values=None,
-                 overwrite_last_value=False, can_set=None, default=None):
+                 overwrite_last_value=False, can_set=None, default=None,
+                 snapshot=True):
         self._values = []
+        self.snapshot = snapshot
+        self._dirty = False
+        self._tracker = None
+        self._name = None
         self._deleted = []
         self._data_type = data_type
         self.default = None
@@ -271,18 +412,9 @@ class ValueManager:
         if not values and default_value is not None:
             values = [default_value, ]
 
-        if not to_python:
-            to_python = lambda x: x
-
-        if not to_graph:
-            to_graph = lambda x: x
-
-        if not can_set:
-            can_set = lambda x: True
-
-        self._to_python = to_python
-        self._to_graph = to_graph
-        self._can_set = can_set
+        self._to_python = to_python or _identity
+        self._to_graph = to_graph or _identity
+        self._can_set = can_set or _can_always_set
         self.filter_field = filter_field
 
         self.hydrate(values=values, reset_initial=reset_initial)
@@ -304,10 +436,30 @@ class ValueManager:
                 self.add_value(value=value, properties=properties)
 
         if reset_initial:
-            self._initial = self._values[:]
+            for value in self._values:
+                value._original = True
+
+            self._dirty = bool(self._deleted)
 
         return self
 
+    def _mark_dirty(self):
+        self._dirty = True
+
+        if self._tracker is not None:
+            self._tracker[self._name] = True
+
+    def _watched(self):
+        """whether the changes could be missed by the dirty flag: a default
+        is saved without being set and the mutable values this manager
+        started with can be changed in place"""
+        if self.default:
+            return True
+
+        return any(value._original and
+                   not isinstance(value._initial, _ATOMIC_TYPES)
+                   for value in self._values)
+
     def __add__(self, value):
         if isinstance(value, Value):
             if not self._can_set(value.value):
@@ -336,6 +488,8 @@ class ValueManager:
                                max_values=self.max_values,
                                overwrite_last_value=self.overwrite_last_value)
         manager._values = self._values
+        manager._tracker = self._tracker
+        manager._name = self._name
 
         return manager
 
@@ -346,12 +500,14 @@ class ValueManager:
         for val in self.filtered_values:
             if val.value == key:
                 val.value = value
+                self._mark_dirty()
 
     def __delitem__(self, value):
         for i, val in enumerate(self._values):
             if val.value == value:
                 deleted = self._values.pop(i)
                 self._deleted.append(deleted)
+                self._mark_dirty()
 
     def _set_data_type(self, data_type):
         converter = self._to_python if data_type == 'python'\
@@ -368,6 +524,24 @@ class ValueManager:
 
     data_type = property(_get_data_type, _set_data_type)
 
+    def _clone(self, source=None, target=None):
+        manager = _copy_state(self, object.__new__(self.__class__))
+        manager._values = [value._clone() for value in self._values]
+        manager._tracker = None
+        manager._deleted = [value._clone() for value in self._deleted]
+
+        if self.default:
+            manager.default = self.default._clone()
+
+        if target is not None:
+            manager._to_python = _rebind(self._to_python, source, target)
+            manager._to_graph = _rebind(self._to_graph, source, target)
+            manager._can_set = _rebind(self._can_set, source, target)
+
+        manager.data_type = manager._data_type
+
+        return manager
+
     def empty(self):
         for value in self.values:
             del self[value]
@@ -378,7 +552,8 @@ class ValueManager:
         if not self._can_set(value):
             return self
 
-        val = Value(value=value, properties=properties, id=id)
+        val = Value(value=value, properties=properties, id=id,
+                    snapshot=self.snapshot)
         x = self.max_values
         l = len(self._values)
 
@@ -391,13 +566,42 @@ class ValueManager:
         else:
             self._values.append(val)
 
+        self._mark_dirty()
+
+        return self
+
+    def add_graphson(self, items):
+        """adds the values of a GraphSON property list in one pass, without
+        building an intermediate Value for each item"""
+        if self.max_values:
+            for item in items:
+                self.add_value(item.get('value', None),
+                               item.get('properties', None),
+                               item.get('id', None))
+
+            return self
+
+        can_set = self._can_set
+        snapshot = self.snapshot
+        append = self._values.append
+
+        for item in items:
+            value = item.get('value', None)
+
+            if can_set(value):
+                append(Value(value, item.get('properties', None),
+                             item.get('id', None), snapshot))
+
+        if items:
+            self._mark_dirty()
+
         return self
 
     @property
     def properties(self):
         properties = [v.properties for v in self.filtered_values]
 
-        return PropertyManager(properties=properties)
+        return PropertyManager(properties=properties, manager=self)
 
     @property
     def filtered_values(self):
@@ -420,25 +624,32 @@ class ValueManager:
     def data(self):
         return [v.data for v in self.filtered_values]
 
+    @property
+    def dirty(self):
+        if self._deleted:
+            return True
+
+        for value in self.filtered_values:
+            if not value._original or value.dirty:
+                return True
+
+        return False
+
     @property
     def changes(self):
-        changed = {'values': self.values}
+        values = self.filtered_values
+        changed = {'values': [v.value for v in values]}
         changes = []
-        added = []
-
-        for v in self.filtered_values:
-            if v not in self._initial:
-                added.append(v.data)
+        added = [v.data for v in values if not v._original]
 
         if added:
             changed['added'] = added
 
-        for v in self.filtered_values:
-            if v not in added:
-                v_changes = v.changes
+        for v in values:
+            v_changes = v.changes
 
-                if v_changes:
-                    changes.append(v_changes)
+            if v_changes:
+                changes.append(v_changes)
 
         if changes:
             changed['changes'] = changes
@@ -454,14 +665,26 @@ class ValueManager:
 
 
 class Value:
+    __slots__ = ('_value', '_callable', '_initial', 'id', 'properties',
+                 'converter', '_original', '_dirty')
 
-    def __init__(self, value, properties=None, id=None):
+    def __init__(self, value, properties=None, id=None, snapshot=True):
         self._value = value
         self._callable = callable(value)
-        self._initial = copy.deepcopy(value)
+
+        if self._callable:
+            self.__class__ = _CallableValue
+
+        """without a snapshot the value itself is kept as the initial value.
+        Replacing it through the value setter still registers as a change,
+        changing a mutable value in place does not
+        """
+        self._initial = _copy_value(value) if snapshot else value
         self.id = id
         self.properties = properties or {}
-        self.converter = lambda value: value._value
+        self.converter = _raw_value
+        self._original = False
+        self._dirty = False
 
     def __setitem__(self, key, value):
         self._properties[key] = value
@@ -469,20 +692,32 @@ class Value:
     def __getitem__(self, key):
         return self._properties.get(key, None)
 
-    def __getattribute__(self, attr):
-        val = object.__getattribute__(self, attr)
+    def _clone(self):
+        value = object.__new__(self.__class__)
+        _value_slot.__set__(value, _copy_value(_value_slot.__get__(self)))
+        value._callable = self._callable
+        value._initial = _copy_value(self._initial)
+        value.id = self.id
+        value.properties = _copy_value(self.properties)
+        value.converter = self.converter
+        value._original = self._original
+        value._dirty = self._dirty
 
-        if attr == '_value' and self._callable:
-            return val()
-        else:
-            return val
+        return value
 
     def get_value(self):
         return self.converter(self)
 
     def set_value(self, value):
         self._callable = callable(value)
+
+        if self._callable:
+            self.__class__ = _CallableValue
+        elif self.__class__ is _CallableValue:
+            self.__class__ = Value
+
         self._value = value
+        self._dirty = True
 
     value = property(get_value, set_value)
 
@@ -493,6 +728,15 @@ class Value:
             'properties': self.properties,
         }
 
+    @property
+    def dirty(self):
+        if self._dirty or self.properties:
+            return True
+
+        value = _value_slot.__get__(self)
+
+        return value is not self._initial and value != self._initial
+
     @property
     def changes(self):
         changes = {}
@@ -510,15 +754,38 @@ class Value:
         return changes
 
 
+_value_slot = Value._value
+
+
+class _CallableValue(Value):
+    """a Value whose stored value is called every time it is read. Only
+    these values pay for the resolution, plain values use the slot
+    directly
+    """
+    __slots__ = ()
+
+    def _get_value(self):
+        return _value_slot.__get__(self)()
+
+    def _set_value(self, value):
+        _value_slot.__set__(self, value)
+
+    _value = property(_get_value, _set_value)
+
+
 class PropertyManager:
 
-    def __init__(self, properties):
+    def __init__(self, properties, manager=None):
         self.properties = properties
+        self.manager = manager
 
     def __setitem__(self, key, val):
         for prop in self.properties:
             prop[key] = val
 
+        if self.manager is not None:
+            self.manager._mark_dirty()
+
         return val
 
     def __getitem__(self, key):
@@ -529,6 +796,9 @@ class PropertyManager:
             if key in prop:
                 del prop[key]
 
+                if self.manager is not None:
+                    self.manager._mark_dirty()
+
     @property
     def data(self):
         return [prop for prop in self.properties if prop]
@@ -592,7 +862,7 @@ class Property:
 
 
 class _ImmutableField:
-    default = ''
+    __slots__ = ()
 
     @property
     def values(self):
@@ -607,27 +877,40 @@ class _ImmutableField:
 
 
 class String(Field):
+    __slots__ = ()
 
     def to_python(self, value):
+        val = value._value
+
+        if type(val) is str:
+            return val
+
         try:
-            if not value._value:
+            if not val:
                 return ''
 
-            return str(value._value)
+            return str(val)
         except:
             return ''
 
 
 class Integer(Field):
+    __slots__ = ()
 
     def to_python(self, value):
+        val = value._value
+
+        if type(val) is int:
+            return val
+
         try:
-            return int(float(value._value))
+            return int(float(val))
         except:
             return 0
 
 
 class Increment(Integer):
+    __slots__ = ()
 
     @property
     def default_value(self):
@@ -640,15 +923,22 @@ class Increment(Integer):
 
 
 class Float(Field):
+    __slots__ = ()
 
     def to_python(self, value):
+        val = value._value
+
+        if type(val) is float:
+            return val
+
         try:
-            return float(value._value)
+            return float(val)
         except:
             return 0.0
 
 
 class Boolean(Field):
+    __slots__ = ()
 
     @property
     def default_value(self):
@@ -663,8 +953,13 @@ class Boolean(Field):
         return bool(json.loads(value))
 
     def to_python(self, value):
+        val = value._value
+
+        if type(val) is bool:
+            return val
+
         try:
-            return self._convert(value._value)
+            return self._convert(val)
         except:
             return False
 
@@ -673,6 +968,7 @@ class Boolean(Field):
 
 
 class Map(Field):
+    __slots__ = ()
 
     def __init__(self, name=None, values=None, data_type='python', *args,
                  **kwargs):
@@ -699,6 +995,7 @@ class Map(Field):
 
 
 class List(Map):
+    __slots__ = ()
 
     @property
     def default_value(self):
@@ -710,6 +1007,7 @@ class List(Map):
 
 
 class Option(Field):
+    __slots__ = ('options',)
 
     def __init__(self, options, name=None, values=None, data_type='python',
                  *args, **kwargs):
@@ -726,6 +1024,7 @@ class Option(Field):
 
 
 class DateTime(Float):
+    __slots__ = ()
 
     def to_python(self, value):
         val = value._value
@@ -739,6 +1038,7 @@ class DateTime(Float):
 
 
 class TimeStamp(DateTime):
+    __slots__ = ()
 
     def __init__(self, name=None, values=None, data_type='python', *args,
                  **kwargs):
@@ -757,16 +1057,16 @@ class TimeStamp(DateTime):
 
 
 class GremlinID(_ImmutableField, String):
-    pass
+    __slots__ = ()
 
 
 class GremlinLabel(GremlinID):
-    pass
+    __slots__ = ()
 
 
 class GremlinType(GremlinLabel):
-    pass
+    __slots__ = ()
 
 
 class GIZMOEntity(GremlinID):
-    pass
+    __slots__ = ()
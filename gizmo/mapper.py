@@ -1,30 +1,135 @@
+import asyncio
+import contextvars
 import logging
 import re
+import time
 
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 
 from gremlinpy.gremlin import Gremlin, Param, AS
 
+from .connection import Response, _entity_properties
 from .entity import (_Entity, Vertex, Edge, GenericVertex, GenericEdge,
     ENTITY_MAP)
 from .exception import (AstronomerQueryException, AstronomerMapperException)
 from .util import (camel_to_underscore, GIZMO_ID, GIZMO_LABEL, GIZMO_TYPE,
-    GIZMO_ENTITY, GIZMO_VARIABLE, entity_name)
+    GIZMO_ENTITY, GIZMO_VARIABLE, GIZMO_PARAM, entity_name)
 
 
 logger = logging.getLogger(__name__)
 ENTITY_MAPPER_MAP = {}
 GENERIC_MAPPER = 'generic.mapper'
-_count = -1
-_query_count = 0
-_query_params = {}
+_VARIABLE_PATTERN = re.compile(r'{}_\d+$'.format(GIZMO_VARIABLE))
+RELATED_DIRECTIONS = ('out', 'in', 'both')
+DELETED_ENTITY_PREFIX = 'DELETED_'
+# the IdentityMap of every mapper with an open identity scope, by id of the
+# mapper. It is kept per context so that coroutines sharing a mapper each
+# get their own scope, tasks started inside a scope inherit it
+_IDENTITY_SCOPES = contextvars.ContextVar('gizmo_identity_scopes',
+                                          default=None)
+
+
+async def _gather_limited(jobs, concurrency):
+    """runs each job, a callable returning an awaitable, with at most
+    concurrency of them in flight. The results keep the order of the jobs.
+    Every job is allowed to finish and all of the failures are reported in a
+    single AstronomerMapperException whose errors attribute holds
+    (index, exception) pairs
+    """
+    semaphore = asyncio.Semaphore(concurrency)
 
+    async def run(job):
+        async with semaphore:
+            return await job()
 
-def next_query_variable():
-    global _count
-    _count += 1
+    results = await asyncio.gather(*[run(job) for job in jobs],
+                                   return_exceptions=True)
+
+    # CancelledError is not an Exception, a cancelled job would otherwise be
+    # returned as its result
+    for res in results:
+        if isinstance(res, asyncio.CancelledError):
+            raise res
+
+    errors = [(i, res) for i, res in enumerate(results)
+              if isinstance(res, BaseException)]
+
+    if errors:
+        error = '{} of {} mapper data calls failed: {}'.format(len(errors),
+            len(results), '; '.join('[{}] {!r}'.format(i, e)
+                                    for i, e in errors))
+        logger.exception(error)
+        exception = AstronomerMapperException(error)
+        exception.errors = errors
+
+        raise exception
+
+    return results
+
+
+class QueryNamespace:
+    """holds the counters used to name the variables and bound params of the
+    script that is being built. Every Mapper owns one, so mappers building
+    scripts at the same time never share or reset each other's names.
+
+    In canonical mode params are named only by their position in the script
+    (gizmo_param_0, gizmo_param_1, ...) instead of by the entity and field
+    they bind. Batches with the same shape then produce byte-identical
+    scripts that differ only in their bindings, which lets Gremlin Server
+    reuse the script it compiled for the first one"""
+
+    def __init__(self, canonical=False):
+        self.canonical = canonical
+        self.reset()
+
+    def reset(self):
+        self._count = -1
+        self._param_count = -1
+        self._params = {}
+
+        return self
+
+    def next_query_variable(self):
+        self._count += 1
+
+        return '{}_{}'.format(GIZMO_VARIABLE, self._count)
+
+    def next_param_name(self, param):
+        if self.canonical:
+            self._param_count += 1
+
+            return '{}_{}'.format(GIZMO_PARAM, self._param_count)
 
-    return '{}_{}'.format(GIZMO_VARIABLE, _count)
+        param = re.sub('\W', '_', param)
+
+        if param not in self._params:
+            self._params[param] = -1
+
+        self._params[param] += 1
+
+        return '{}_{}'.format(param, self._params[param])
+
+    def next_param(self, param, value):
+        if isinstance(value, _Entity):
+            value = entity_name(value)
+
+        return Param(self.next_param_name(param), value)
+
+    def next_entity_param(self, entity, param, value):
+        name = entity_name(entity)
+        field = '{}_{}'.format(name, param)
+
+        return self.next_param(field, value)
+
+
+# used by the module level helpers below, which are kept for code that
+# builds gremlin outside of a Mapper
+_namespace = QueryNamespace()
+
+
+def next_query_variable():
+    return _namespace.next_query_variable()
 
 
 def get_entity_mapper(entity=None, name=GENERIC_MAPPER):
@@ -40,34 +145,24 @@ def get_entity_mapper(entity=None, name=GENERIC_MAPPER):
 
 
 def next_param_name(param):
-    param = re.sub('\W', '_', param)
-
-    if param not in _query_params:
-        _query_params[param] = -1
-
-    _query_params[param] += 1
-
-    return '{}_{}'.format(param, _query_params[param])
+    return _namespace.next_param_name(param)
 
 
 def next_param(param, value):
-    if isinstance(value, _Entity):
-        value = entity_name(value)
-
-    return Param(next_param_name(param), value)
+    return _namespace.next_param(param, value)
 
 
 def next_entity_param(entity, param, value):
-    name = entity_name(entity)
-    field = '{}_{}'.format(name, param)
-
-    return next_param(field, value)
+    return _namespace.next_entity_param(entity, param, value)
 
 
 class Mapper:
 
     def __init__(self, request, gremlin=None, auto_commit=True,
-                 graph_instance_name=None):
+                 graph_instance_name=None, canonical=False,
+                 max_statements=None, max_script_bytes=None,
+                 max_bindings=None, pipeline=False, data_concurrency=None,
+                 entity_cache=None, query_cache=None):
         if not gremlin:
             gremlin = Gremlin()
 
@@ -75,6 +170,15 @@ class Mapper:
         self.gremlin = gremlin
         self.auto_commit = auto_commit
         self.graph_instance_name = graph_instance_name
+        self.namespace = QueryNamespace(canonical=canonical)
+        self.max_statements = max_statements
+        self.max_script_bytes = max_script_bytes
+        self.max_bindings = max_bindings
+        self.pipeline = pipeline
+        self.data_concurrency = data_concurrency
+        self.entity_cache = entity_cache
+        self.query_cache = query_cache
+        self._loaders = {}
 
         if not self.auto_commit and not self.graph_instance_name:
             error = ('If auto_commit is set, we need to know the'
@@ -86,29 +190,138 @@ class Mapper:
 
     def reset(self):
         self.gremlin.reset()
-        global _query_count
-        global _count
-        global _query_params
-
-        _query_count = 0
-        _count = 0
-        _query_params = {}
+        self.namespace.reset()
         self.queries = []
         self.return_vars = []
         self.entities = OrderedDict()  # ensure FIFO for testing
+        self._entity_variables = {}
         self.del_entities = {}
         self.params = {}
         self.callbacks = {}
         self._magic_method = None
 
     def get_entity_variable(self, entity):
-        ret = None
+        """returns the first variable the entity was bound to in the current
+        script. Entities are looked up by identity"""
+        return self._entity_variables.get(id(entity), None)
+
+    @contextmanager
+    def identity_scope(self):
+        """unit of work scope in which an entity is only created once for
+        each type and id. Fetching it again returns the same instance
+        without hydrating it again and saving it updates that instance
+
+            with mapper.identity_scope():
+                user = (await mapper.start(User).to_collection()).first()
+                same = (await mapper.get(user).to_collection()).first()
+
+        nested scopes share the outermost scope's IdentityMap. Scopes belong
+        to the task that opens them, coroutines sharing the mapper each open
+        their own
+        """
+        scopes = _IDENTITY_SCOPES.get() or {}
 
-        for key, def_entity in self.entities.items():
-            if entity == def_entity:
-                return key
+        if id(self) in scopes:
+            yield scopes[id(self)]
+            return
 
-        return ret
+        identity_map = IdentityMap()
+        scopes = dict(scopes)
+        scopes[id(self)] = identity_map
+        token = _IDENTITY_SCOPES.set(scopes)
+
+        try:
+            yield identity_map
+        finally:
+            _IDENTITY_SCOPES.reset(token)
+
+    @property
+    def identity_map(self):
+        """the IdentityMap of the identity scope open in the current task"""
+        scopes = _IDENTITY_SCOPES.get()
+
+        return scopes.get(id(self)) if scopes else None
+
+    def loader(self, name, batch_load=None, max_batch_size=None,
+               cache=False):
+        """returns the DataLoader registered under name, creating it with
+        batch_load the first time it is asked for. Loaders outlive reset so
+        that the lookups of concurrent mapper methods share them"""
+        if name not in self._loaders:
+            if batch_load is None:
+                error = 'There is no loader registered as {}'.format(name)
+                logger.exception(error)
+                raise AstronomerMapperException(error)
+
+            self._loaders[name] = DataLoader(batch_load,
+                                             max_batch_size=max_batch_size,
+                                             cache=cache)
+
+        return self._loaders[name]
+
+    async def related(self, entity, label=None, direction='out',
+                      edges=False, snapshot=True):
+        """returns the list of entities connected to entity. The calls made
+        for entities in the same tick of the event loop, like the ones of a
+        concurrent Mapper.data, are answered by a single query
+
+            async def get_friends(self, entity, data):
+                friends = await self.mapper.related(entity, 'knows')
+                data['friends'] = [f.data for f in friends]
+                return data
+
+        edges=True returns the connecting edges instead of the vertices
+        """
+        if direction not in RELATED_DIRECTIONS:
+            error = 'The direction must be one of {}, got {}'.format(
+                ', '.join(RELATED_DIRECTIONS), direction)
+            logger.exception(error)
+            raise AstronomerMapperException(error)
+
+        if not entity[GIZMO_ID]:
+            error = ('The entity {} does not have an id and its related'
+                     ' entities cannot be loaded').format(str(entity))
+            logger.exception(error)
+            raise AstronomerMapperException(error)
+
+        name = ('related', direction, label, edges, snapshot)
+
+        async def batch_load(ids):
+            return await self._load_related(ids, label, direction, edges,
+                                            snapshot)
+
+        return await self.loader(name, batch_load).load(entity[GIZMO_ID])
+
+    async def _load_related(self, ids, label, direction, edges, snapshot):
+        # the parameter names are fixed so that every batch of the same shape
+        # sends the same script
+        gremlin = Gremlin(self.gremlin.gv)
+        step = direction + ('E' if edges else '')
+        parent = Param('related_parent', 'parent')
+        child = Param('related_child', 'related')
+
+        gremlin.V(Param('related_ids', list(ids))).AS(parent)
+
+        if label:
+            getattr(gremlin, step)(Param('related_label', label))
+        else:
+            getattr(gremlin, step)()
+
+        gremlin.AS(child).select(parent, child).unbound('by', 'T.id').by()
+
+        response = await self.request.send(str(gremlin),
+                                           gremlin.bound_params)
+        # the server answers with its native ids, which are not always the
+        # strings that entities keep
+        related = {str(_id): [] for _id in ids}
+
+        for row in response.data:
+            entity = self.create(data=_entity_properties(row['related']),
+                                 snapshot=snapshot)
+
+            related.setdefault(str(row['parent']), []).append(entity)
+
+        return [related[str(_id)] for _id in ids]
 
     def get_mapper(self, entity=None, name=GENERIC_MAPPER):
         if entity is not None:
@@ -125,6 +338,9 @@ class Mapper:
         self.entities.update(mapper.entities)
         self.params.update(mapper.params)
 
+        for key, variable in mapper._entity_variables.items():
+            self._entity_variables.setdefault(key, variable)
+
         for entity, callbacks in mapper.callbacks.items():
             exisiting = self.callbacks.get(entity, [])
 
@@ -157,7 +373,7 @@ class Mapper:
 
         return getattr(mapper, self._magic_method)(*args, **kwargs)
 
-    async def data(self, entity, *args):
+    async def data(self, entity, *args, concurrency=None):
         """utility method used to retrieve an entity's data. It
         also allows for method chaining in order to augment the
         resulting data.
@@ -176,9 +392,18 @@ class Mapper:
 
         the resulting data will have the data from the User class,
         plus a two and a three member
+
+        when given a Collection, concurrency (defaulting to the mapper's
+        data_concurrency) limits how many of its entities are processed at
+        once. The data is returned in the collection's order and failures are
+        raised together as an AstronomerMapperException. Without it the
+        entities are processed one after the other
         """
         collection = isinstance(entity, Collection)
 
+        if concurrency is None:
+            concurrency = self.data_concurrency
+
         async def get_data(entity, data):
             retrieved = data
 
@@ -196,7 +421,17 @@ class Mapper:
 
             return retrieved
 
-        if collection:
+        async def get_entity_data(coll_entity):
+            mapper = self.get_mapper(coll_entity)
+            entity_data = await mapper.data(coll_entity)
+
+            return await get_data(coll_entity, entity_data)
+
+        if collection and concurrency and concurrency > 1:
+            data = await _gather_limited([
+                lambda e=coll_entity: get_entity_data(e)
+                for coll_entity in entity], concurrency)
+        elif collection:
             data = []
 
             for coll_entity in entity:
@@ -223,6 +458,66 @@ class Mapper:
 
         return self._enqueue_mapper(mapper)
 
+    def bulk_save(self, entities, callback=None):
+        """saves a list of new vertices with as few statements as possible.
+        Vertices are grouped by type, label and the shape of their changes
+        (which fields and how many values each) and every group is created
+        by a single Groovy loop over a list-of-maps binding. The ids are
+        written back into the entities from the list that the loop returns.
+
+        Entities that cannot be created that way, like edges, updates,
+        vertices with meta-properties, or ones whose mapper customizes
+        saving, go through the regular save after the groups are queued. That
+        way edges reference the bulk created vertices instead of creating
+        them a second time
+        """
+        groups = OrderedDict()
+        singles = []
+        seen = set()
+
+        for entity in entities:
+            # an entity listed twice would otherwise be created twice
+            if id(entity) in seen:
+                continue
+
+            seen.add(id(entity))
+            mapper = self.get_mapper(entity)
+            row = None
+
+            if self._can_bulk_save(entity, mapper):
+                row = Query(self).bulk_row(entity)
+
+            if row is None:
+                singles.append((entity, mapper))
+                continue
+
+            shape, values = row
+            key = (entity.__class__, entity[GIZMO_LABEL[0]], shape)
+
+            if key not in groups:
+                groups[key] = (mapper, [], [])
+
+            groups[key][1].append(entity)
+            groups[key][2].append(values)
+
+        for (_, _, shape), (mapper, group, rows) in groups.items():
+            logger.debug(('Bulk saving {} entities with mapper:'
+                ' {}').format(len(group), mapper))
+            mapper.bulk_save(group, shape, rows, callback=callback)
+            self._enqueue_mapper(mapper)
+
+        for entity, mapper in singles:
+            self.save(entity, mapper=mapper, callback=callback)
+
+        return self
+
+    def _can_bulk_save(self, entity, mapper):
+        return (isinstance(entity, Vertex) and not entity[GIZMO_ID]
+                and self.get_entity_variable(entity) is None
+                and not mapper.save_statements and not mapper.unique_fields
+                and type(mapper).save is EntityMapper.save
+                and type(mapper)._save_vertex is EntityMapper._save_vertex)
+
     def delete(self, entity, mapper=None, callback=None):
         if mapper is None:
             mapper = self.get_mapper(entity)
@@ -235,15 +530,26 @@ class Mapper:
         # manually add the deleted entity to the self.entities
         # collection for callbacks
         from random import randrange
-        key = 'DELETED_%s_entity' % str(randrange(0, 999999999))
+        key = '%s%s_entity' % (DELETED_ENTITY_PREFIX,
+                               str(randrange(0, 999999999)))
         self.del_entities[key] = entity
 
         return self._enqueue_mapper(mapper)
 
-    def create(self, data=None, entity=None, data_type='python'):
+    def create(self, data=None, entity=None, data_type='python',
+               snapshot=True):
         if data is None:
             data = {}
 
+        identity = None
+
+        if self.identity_map is not None:
+            identity = IdentityMap.data_key(data, entity)
+            cached = self.identity_map.get(identity)
+
+            if cached is not None:
+                return cached
+
         if entity:
             mapper = self.get_mapper(entity)
         else:
@@ -258,9 +564,14 @@ class Mapper:
             'data': data,
             'entity': entity,
             'data_type': data_type,
+            'snapshot': snapshot,
         }
+        created = mapper.create(**kwargs)
 
-        return mapper.create(**kwargs)
+        if identity is not None:
+            self.identity_map.add(created)
+
+        return created
 
     def connect(self, out_v, in_v, label=None, data=None, edge_entity=None,
                 data_type='python'):
@@ -322,6 +633,11 @@ class Mapper:
         return self
 
     async def send(self):
+        if self._exceeds_limits(len(self.queries) + 1,
+                                sum(len(q) + 2 for q in self.queries),
+                                len(self.params)):
+            return await self._send_chunks()
+
         self._build_queries()
 
         script = ";\n".join(self.queries)
@@ -336,8 +652,235 @@ class Mapper:
 
         return res
 
+    def _exceeds_limits(self, statements, script_bytes, bindings):
+        return ((self.max_statements and statements > self.max_statements)
+            or (self.max_script_bytes and script_bytes > self.max_script_bytes)
+            or (self.max_bindings and bindings > self.max_bindings))
+
+    def _rebind_statement(self, variable, entity=None):
+        """returns the statement and binding that re-declare a variable in a
+        later chunk from the id(s) the chunk that defined it got back"""
+        gv = self.gremlin.gv
+
+        if isinstance(entity, list):
+            name = '{}_ids'.format(variable)
+            statement = '{} = {}.collect{{ {}.V(it).next() }}'.format(
+                variable, name, gv)
+            value = [member[GIZMO_ID] for member in entity]
+            missing = not all(value)
+        else:
+            name = '{}_id'.format(variable)
+            entity_type, value = ('V', None)
+
+            if entity is not None:
+                entity_type, value = entity.get_rep()
+
+            statement = '{} = {}.{}({}).next()'.format(variable, gv,
+                                                       entity_type, name)
+            missing = not value
+
+        if entity is not None and missing:
+            error = ('The variable {} is referenced by a later part of the'
+                     ' batch but its entity did not get an id'.format(variable))
+            logger.exception(error)
+            raise AstronomerMapperException(error)
+
+        return statement, {name: value}
+
+    def _split_queries(self):
+        """splits the queued statements into chunks that stay within the
+        max_statements, max_script_bytes and max_bindings limits. Variables a
+        chunk uses that were defined by an earlier chunk are counted towards
+        the limits as the statements that will re-declare them. A statement
+        that is over the limits on its own is sent in a chunk by itself"""
+        param_names = set(self.params.keys())
+        return_vars = set(self.return_vars)
+        chunks = []
+        chunk = None
+
+        for statement in self.queries:
+            words = set(re.findall(r'\w+', statement))
+            match = re.match(r'(\w+) = ', statement)
+            defines = None
+
+            if match and _VARIABLE_PATTERN.match(match.group(1)):
+                defines = match.group(1)
+
+            refs = set(w for w in words if _VARIABLE_PATTERN.match(w))
+            refs.discard(defines)
+            params = words & param_names
+            size = len(statement) + 2
+
+            if defines in return_vars:
+                size += len("'{0}': {0}, ".format(defines))
+
+            if chunk is not None:
+                new_refs = refs - chunk['defines'] - chunk['refs']
+                rebinds = sum(len(self._rebind_statement(r)[0]) + 2
+                    for r in new_refs)
+
+                if self._exceeds_limits(
+                        len(chunk['queries']) + len(chunk['refs']) +
+                            len(new_refs) + 2,
+                        chunk['bytes'] + size + rebinds,
+                        len(chunk['params'] | params) + len(chunk['refs']) +
+                            len(new_refs)):
+                    chunk = None
+
+            if chunk is None:
+                chunk = {'queries': [], 'defines': set(), 'refs': set(),
+                         'params': set(), 'bytes': 0}
+                chunks.append(chunk)
+
+            new_refs = refs - chunk['defines'] - chunk['refs']
+            chunk['bytes'] += size + sum(len(self._rebind_statement(r)[0]) + 2
+                for r in new_refs)
+            chunk['queries'].append(statement)
+            chunk['refs'] |= new_refs
+            chunk['params'] |= params
+
+            if defines:
+                chunk['defines'].add(defines)
+
+        return chunks
+
+    async def _send_chunks(self):
+        """sends the queued statements in several requests. With pipeline
+        set, consecutive chunks that do not use each other's variables are
+        sent at the same time"""
+        chunks = self._split_queries()
+        params = self.params
+        return_vars = self.return_vars
+        entities = self.entities
+        callbacks = self.callbacks
+        entities.update(self.del_entities)
+        self.reset()
+
+        defined_by = {}
+        waves = []
+        wave = []
+
+        for i, chunk in enumerate(chunks):
+            for variable in chunk['defines']:
+                defined_by[variable] = i
+
+            depends = set(defined_by[r] for r in chunk['refs']
+                if r in defined_by)
+
+            if wave and (not self.pipeline or depends & set(wave)):
+                waves.append(wave)
+                wave = []
+
+            wave.append(i)
+
+        if wave:
+            waves.append(wave)
+
+        logger.debug('Sending the batch in {} parts'.format(len(chunks)))
+
+        async def send_chunk(chunk):
+            queries = []
+            bindings = {name: params[name] for name in chunk['params']}
+
+            for variable in sorted(chunk['refs']):
+                statement, bound = self._rebind_statement(variable,
+                    entities.get(variable))
+                queries.append(statement)
+                bindings.update(bound)
+
+            queries += chunk['queries']
+            returns = [v for v in return_vars if v in chunk['defines']]
+
+            if returns:
+                queries.append('[{}]'.format(', '.join(
+                    "'{}': {}".format(v, v) for v in returns)))
+
+            update_entities = {v: entities[v] for v in chunk['defines']
+                if v in entities}
+
+            return await self.request.send(";\n".join(queries), bindings,
+                                           update_entities)
+
+        responses = []
+
+        for wave in waves:
+            responses += await asyncio.gather(*[send_chunk(chunks[i])
+                for i in wave])
+
+        self._update_identity_map(entities)
+        self._invalidate_query_cache(entities)
+        self._run_callbacks(entities, callbacks)
+
+        return Collection(self, Response.merge(responses))
+
+    def _update_identity_map(self, update_entities):
+        """keeps the saved entities in the identity map and drops the deleted
+        ones. An entity saved while another instance is mapped to its id
+        updates that instance"""
+        if self.identity_map is None:
+            return
+
+        for key, entity in update_entities.items():
+            members = entity if isinstance(entity, list) else [entity]
+
+            for entity in members:
+                if key.startswith(DELETED_ENTITY_PREFIX):
+                    self.identity_map.discard(entity)
+                    continue
+
+                cached = self.identity_map.add(entity)
+
+                if cached is not entity:
+                    self._refresh_entity(cached, entity)
+
+    def _refresh_entity(self, cached, entity):
+        """replaces the values of the mapped instance with the ones of the
+        saved entity, field by field. The label, id, type and entity fields
+        are immutable and already match"""
+        fields = cached.fields
+        values = {}
+
+        for name, field in entity.fields.fields.items():
+            if not field.immutable:
+                values[name] = [{'id': value.id, 'value': value.value,
+                                 'properties': dict(value.properties)}
+                                for value in field._values._values]
+
+        for name, field in fields.fields.items():
+            if not field.immutable:
+                field.empty()
+
+        fields.hydrate({name: items for name, items in values.items()
+                        if items})
+
+    def _invalidate_query_cache(self, update_entities):
+        """drops the cached queries tagged with the label of an entity that
+        was saved or deleted"""
+        if self.query_cache is None or not update_entities:
+            return
+
+        labels = set()
+
+        for entity in update_entities.values():
+            members = entity if isinstance(entity, list) else [entity]
+            labels.update(member[GIZMO_LABEL[0]] for member in members)
+
+        self.query_cache.invalidate_tags(labels)
+
+    def _run_callbacks(self, update_entities, callbacks):
+        callbacks = callbacks or {}
+
+        for k, entity in update_entities.items():
+            members = entity if isinstance(entity, list) else [entity]
+
+            for entity in members:
+                cbs = callbacks.get(entity, [])
+                for c in cbs:
+                    c(entity)
+
     async def query(self, script=None, params=None, gremlin=None,
-                    update_entities=None, callbacks=None, collection=None):
+                    update_entities=None, callbacks=None, collection=None,
+                    snapshot=True):
         if gremlin is not None:
             script = str(gremlin)
             params = gremlin.bound_params
@@ -357,15 +900,41 @@ class Mapper:
 
         response = await self.request.send(script, params, update_entities)
 
-        for k, entity in update_entities.items():
-            cbs = callbacks.get(entity, [])
-            for c in cbs:
-                c(entity)
+        self._update_identity_map(update_entities)
+        self._invalidate_query_cache(update_entities)
+        self._run_callbacks(update_entities, callbacks)
 
         if not collection:
             collection = Collection
 
-        return collection(self, response)
+        return collection(self, response, snapshot=snapshot)
+
+    def stream(self, script=None, params=None, gremlin=None, prefetch=2,
+               collection=None, snapshot=True):
+        """runs the query and returns a StreamingCollection that hydrates
+        the resulting entities one server batch at a time instead of waiting
+        for the whole result set"""
+        if gremlin is not None:
+            script = str(gremlin)
+            params = gremlin.bound_params
+
+            gremlin.reset()
+
+        if script is None:
+            script = ''
+
+        if params is None:
+            params = {}
+
+        self.reset()
+
+        response_stream = self.request.stream(script, params)
+
+        if not collection:
+            collection = StreamingCollection
+
+        return collection(self, response_stream, prefetch=prefetch,
+                          snapshot=snapshot)
 
 
 class _RootMapper(type):
@@ -426,9 +995,20 @@ class EntityMapper(metaclass=_RootMapper):
         self.queries = []
         self.return_vars = []
         self.entities = {}
+        self._entity_variables = {}
         self.params = {}
         self.callbacks = {}
 
+    @property
+    def namespace(self):
+        if self.mapper is not None:
+            return self.mapper.namespace
+
+        return _namespace
+
+    def get_entity_variable(self, entity):
+        return self._entity_variables.get(id(entity), None)
+
     async def data(self, entity):
         return entity.data
 
@@ -437,7 +1017,7 @@ class EntityMapper(metaclass=_RootMapper):
         vertex = issubclass(self.entity, Vertex)
         param_value = str(self.entity)
         param_name = 'out_{}_{}'.format(entity.__class__.__name__, param_value)
-        entity_param = next_param(param_name, param_value)
+        entity_param = self.namespace.next_param(param_name, param_value)
 
         if vertex:
             trav.out().hasLabel(entity_param)
@@ -454,13 +1034,22 @@ class EntityMapper(metaclass=_RootMapper):
                 continue
 
             if bind_return:
-                variable = next_query_variable()
+                variable = self.namespace.next_query_variable()
                 script = '{} = {}'.format(variable, script)
 
                 if 'entity' in entry:
-                    self.entities[variable] = entry['entity']
+                    entity = entry['entity']
+                    self.entities[variable] = entity
                     self.return_vars.append(variable)
 
+                    if isinstance(entity, list):
+                        for i, member in enumerate(entity):
+                            self._entity_variables.setdefault(id(member),
+                                '{}[{}]'.format(variable, i))
+                    else:
+                        self._entity_variables.setdefault(id(entity),
+                                                          variable)
+
             self.queries.append(script)
             self.params.update(entry['params'])
 
@@ -488,6 +1077,12 @@ class EntityMapper(metaclass=_RootMapper):
     def on_delete(self, entity):
         pass
 
+    def _invalidate_cache(self, entity):
+        cache = getattr(self.mapper, 'entity_cache', None)
+
+        if cache is not None:
+            cache.invalidate_entity(entity)
+
     def _build_save_statements(self, entity, query, **kwargs):
         statement_query = Query(self.mapper)
         query_gremlin = Gremlin(self.gremlin.gv)
@@ -520,6 +1115,7 @@ class EntityMapper(metaclass=_RootMapper):
 
         if entity[GIZMO_ID]:
             callback.insert(0, self.on_update)
+            callback.insert(0, self._invalidate_cache)
         else:
             callback.insert(0, self.on_create)
 
@@ -527,6 +1123,21 @@ class EntityMapper(metaclass=_RootMapper):
 
         return getattr(self, method)(entity=entity, bind_return=bind_return)
 
+    def bulk_save(self, entities, shape, rows, callback=None):
+        """queues the creation of same shaped vertices in one statement. See
+        Mapper.bulk_save"""
+        query = Query(self.mapper)
+
+        if not isinstance(callback, (list, tuple)):
+            callback = [callback] if callback else []
+
+        for entity in entities:
+            self._enqueue_callback(entity, [self.on_create] + list(callback))
+
+        query.bulk_add_vertices(entities, shape, rows)
+
+        return self.enqueue(query, True)
+
     def _save_vertex(self, entity, bind_return=True):
         """
         method used to save a entity. IF both the unique_type and unique_fields
@@ -619,17 +1230,20 @@ class EntityMapper(metaclass=_RootMapper):
 
         query.delete(entity)
         callback.insert(0, self.on_delete)
+        callback.insert(0, self._invalidate_cache)
         self._enqueue_callback(entity, callback)
 
         return self.enqueue(query, False)
 
-    def create(self, data=None, entity=None, data_type='python'):
+    def create(self, data=None, entity=None, data_type='python',
+               snapshot=True):
         """
         Method used to create a new entity based on the data that is passed in.
         If the kwarg entity is passed in, it will be used to create the
         entity else if utils.GIZMO_ENTITY is in data, that will be used
         finally, entity.GenericVertex or entity.GenericEdge will be used to
-        construct the entity
+        construct the entity. snapshot=False skips copying the initial
+        state of the data, see Collection
         """
         check = True
 
@@ -639,7 +1253,8 @@ class EntityMapper(metaclass=_RootMapper):
         if entity is not None:
             try:
                 label = data.get(GIZMO_LABEL[0], None)
-                entity = entity(data=data, data_type=data_type)
+                entity = entity(data=data, data_type=data_type,
+                                snapshot=snapshot)
                 check = False
             except Exception as e:
                 pass
@@ -652,15 +1267,18 @@ class EntityMapper(metaclass=_RootMapper):
                     if isinstance(name, (list, tuple)):
                         name = name[0]['value']
 
-                    entity = ENTITY_MAP[name](data=data, data_type=data_type)
+                    entity = ENTITY_MAP[name](data=data, data_type=data_type,
+                                              snapshot=snapshot)
                 else:
                     raise
             except Exception as e:
                 # all else fails create a GenericVertex unless _type is 'edge'
                 if data.get(GIZMO_TYPE, None) == 'edge':
-                    entity = GenericEdge(data=data, data_type=data_type)
+                    entity = GenericEdge(data=data, data_type=data_type,
+                                         snapshot=snapshot)
                 else:
-                    entity = GenericVertex(data=data, data_type=data_type)
+                    entity = GenericVertex(data=data, data_type=data_type,
+                                           snapshot=snapshot)
 
         if GIZMO_ID in data:
             entity[GIZMO_ID] = data[GIZMO_ID]
@@ -677,6 +1295,7 @@ class EntityMapper(metaclass=_RootMapper):
 
         query.delete(entity)
         callback.insert(0, self.on_delete)
+        callback.insert(0, self._invalidate_cache)
         self._enqueue_callback(entity, callback)
 
         return self.enqueue(query, False)
@@ -686,6 +1305,7 @@ class Query:
 
     def __init__(self, mapper):
         self.mapper = mapper
+        self.namespace = mapper.namespace
         self.gremlin = Gremlin(self.mapper.gremlin.gv)
         self.queries = []
         self.fields = []
@@ -717,6 +1337,7 @@ class Query:
         return self.reset()
 
     def _field_changes(self, gremlin, entity, ignore=None):
+        next_param = self.namespace.next_param
         ignore = ignore or []
         entity_name = str(entity)
         entity_alias = '{}_alias'.format(entity_name)
@@ -781,6 +1402,7 @@ class Query:
                                 val['properties'])
 
     def _add_vertex(self, entity, set_variable=None):
+        next_entity_param = self.namespace.next_entity_param
         entity.data_type = 'graph'
         gremlin = self.gremlin
         label = None
@@ -803,6 +1425,7 @@ class Query:
         return self._add_gremlin_query(entity)
 
     def _update_entity(self, entity, set_variable=None):
+        next_param = self.namespace.next_param
         entity.data_type = 'graph'
         gremlin = self.gremlin
         entity_type, entity_id = entity.get_rep()
@@ -815,8 +1438,10 @@ class Query:
 
         _id = next_param('{}_ID'.format(str(entity)), entity_id)
         ignore = [GIZMO_ID, GIZMO_LABEL[1]]
+        # the id is only part of the alias' value so that the name, and
+        # with it the script, stays the same for every entity updated
         alias = '{}_{}_updating'.format(entity_type, entity_id)
-        alias = next_param(alias, alias)
+        alias = next_param('{}_updating'.format(entity_type), alias)
 
         getattr(gremlin, entity_type.upper())(_id)
         gremlin.AS(alias)
@@ -829,6 +1454,8 @@ class Query:
         return self._add_gremlin_query(entity)
 
     def _add_edge(self, entity, set_variable=None):
+        next_param = self.namespace.next_param
+
         if not entity[GIZMO_LABEL[0]]:
             msg = 'A label is required in order to create an edge'
             logger.exception(msg)
@@ -941,6 +1568,79 @@ class Query:
 
         return self._add_gremlin_query(entity)
 
+    def bulk_row(self, entity):
+        """returns the (shape, values) pair used to bulk create the entity.
+        The shape is a tuple of (field, number of values) pairs and the values
+        map each field to its values. None is returned when the changes
+        cannot be expressed as plain values"""
+        ignore = ['T.label', 'label']
+        shape = []
+        values = {}
+        entity.data_type = 'graph'
+
+        try:
+            for field, changes in entity.changes.items():
+                if field in ignore:
+                    continue
+
+                if changes['immutable']:
+                    field_values = changes['values']['values']
+                elif changes['deleted']:
+                    return None
+                else:
+                    field_values = []
+
+                    for val in changes['values'].get('added', []):
+                        if val['properties']:
+                            return None
+
+                        field_values.append(val['value'])
+
+                if field_values:
+                    shape.append((field, len(field_values)))
+                    values[field] = field_values
+        finally:
+            entity.data_type = 'python'
+
+        return tuple(shape), values
+
+    def bulk_add_vertices(self, entities, shape, rows):
+        """
+        gizmo_rows.collect{ gizmo_row ->
+            g.addV(T.label, $LABEL).property($FIELD, gizmo_row[$FIELD][0])
+                ....next()
+        }
+        """
+        next_param = self.namespace.next_param
+        entity = entities[0]
+        name = str(entity)
+        row = 'gizmo_row'
+        gremlin = Gremlin(self.gremlin.gv)
+
+        if entity[GIZMO_LABEL[0]]:
+            label = self.namespace.next_entity_param(entity, 'label',
+                entity[GIZMO_LABEL[0]])
+            gremlin.unbound('addV', 'T.label', label)
+        else:
+            gremlin.addV()
+
+        for field, count in shape:
+            field_param = next_param('{}_{}'.format(name, field), field)
+
+            for i in range(count):
+                value = '{}[{}][{}]'.format(row, field_param.name, i)
+                gremlin.unbound('property', field_param, value)
+
+        gremlin.func('next')
+
+        rows_param = next_param('{}_rows'.format(name), rows)
+        params = gremlin.bound_params
+        params[rows_param.name] = rows_param.value
+        script = '{}.collect{{ {} -> {} }}'.format(rows_param.name, row,
+                                                    str(gremlin))
+
+        return self._add_query(script, params, entities)
+
     def save(self, entity, set_variable=None):
         if not entity[GIZMO_TYPE]:
             msg = 'The entity does not have a type defined'
@@ -958,6 +1658,7 @@ class Query:
             self._update_entity(entity, set_variable)
 
     def delete(self, entity):
+        next_param = self.namespace.next_param
         entity_type, _id = entity.get_rep()
 
         if not _id:
@@ -979,9 +1680,16 @@ class Query:
 
 
 class Collection(object):
+    """Entities are hydrated from the response as they are accessed. With
+    snapshot=False the entities skip copying their initial state, which is
+    most of the cost of hydrating read-only results. Values replaced or
+    removed through the entity are still tracked, values that are mutable
+    and changed in place are not
+    """
 
-    def __init__(self, mapper, response=None):
+    def __init__(self, mapper, response=None, snapshot=True):
         self.mapper = mapper
+        self.snapshot = snapshot
 
         if not response:
             response = lambda: None
@@ -1017,11 +1725,27 @@ class Collection(object):
         """this will get the data from the entity's mapper if it has a
         custom mapper
         """
+        return await self.get_mapper_data()
+
+    async def get_mapper_data(self, concurrency=None):
+        """mapper_data with at most concurrency entities processed at once,
+        defaulting to the mapper's data_concurrency. The data keeps the
+        collection's order and failures are raised together as an
+        AstronomerMapperException
+        """
         data = []
 
+        if concurrency is None:
+            concurrency = self.mapper.data_concurrency
+
         if len(self):
             mapper = self.mapper.get_mapper(self[0])
 
+            if concurrency and concurrency > 1:
+                return await _gather_limited([
+                    lambda e=entity: mapper.data(e) for entity in self],
+                    concurrency)
+
             for entity in self:
                 data.append(await mapper.data(entity))
 
@@ -1038,8 +1762,15 @@ class Collection(object):
                 data = self.response[key]
 
                 if data is not None:
+                    timings = getattr(self.response, 'timings', None)
+                    start = time.perf_counter()
                     entity = self.mapper.create(data=data,
-                                                data_type=self._data_type)
+                                                data_type=self._data_type,
+                                                snapshot=self.snapshot)
+
+                    if timings is not None:
+                        timings['hydrate'] += \
+                            (time.perf_counter() - start) * 1000
                     entity.dirty = False
                     self._entities[key] = entity
                 else:
@@ -1066,6 +1797,262 @@ class Collection(object):
         return entity
 
 
+class StreamingCollection(object):
+    """Collection counterpart for results that are read as a stream. Entities
+    are hydrated a batch at a time as the server's frames arrive and are only
+    available through async iteration:
+
+        async for user in mapper.stream(gremlin=g):
+            ...
+
+    Up to prefetch batches are read ahead of the consumer in the background;
+    set it to 0 to only read a batch when the previous one is used up.
+    Iteration that is stopped early should close the collection (or use it
+    as an async context manager) so that the underlying stream is closed
+    """
+
+    def __init__(self, mapper, stream, prefetch=2, snapshot=True):
+        self.mapper = mapper
+        self.stream = stream
+        self.prefetch = prefetch
+        self.snapshot = snapshot
+        self._batches = None
+        self._reader = None
+        self._current = deque()
+        self._done = False
+        self._data_type = 'python'
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._current:
+            batch = await self._next_batch()
+
+            if batch is None:
+                raise StopAsyncIteration()
+
+            self._current.extend(self._hydrate(batch))
+
+        return self._current.popleft()
+
+    async def _next_batch(self):
+        if self._done:
+            return None
+
+        if not self.prefetch:
+            try:
+                return await self.stream.__anext__()
+            except StopAsyncIteration:
+                self._done = True
+
+                return None
+
+        if self._reader is None:
+            self._batches = asyncio.Queue(maxsize=self.prefetch)
+            self._reader = asyncio.ensure_future(self._read())
+
+        batch = await self._batches.get()
+
+        if isinstance(batch, Exception):
+            self._done = True
+
+            raise batch
+
+        if batch is None:
+            self._done = True
+
+        return batch
+
+    async def _read(self):
+        try:
+            async for batch in self.stream:
+                await self._batches.put(batch)
+
+            await self._batches.put(None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._batches.put(e)
+
+    def _hydrate(self, batch):
+        entities = []
+
+        for data in batch.data:
+            entity = self.mapper.create(data=data, data_type=self._data_type,
+                                        snapshot=self.snapshot)
+            entity.dirty = False
+
+            entities.append(entity)
+
+        return entities
+
+    async def close(self):
+        self._done = True
+        self._current.clear()
+
+        if self._reader is not None and not self._reader.done():
+            self._reader.cancel()
+
+        await self.stream.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+class IdentityMap(object):
+    """the entities of an identity scope keyed by their type and id, see
+    Mapper.identity_scope"""
+
+    def __init__(self):
+        self._entities = {}
+
+    @staticmethod
+    def data_key(data, entity=None):
+        """the key of the entity that would be created from data, None when
+        the data does not have an id"""
+        _id = data.get(GIZMO_ID)
+
+        if isinstance(_id, (list, tuple)):
+            _id = _id[0]['value'] if _id else None
+
+        if _id is None or _id == '':
+            return None
+
+        _type = data.get(GIZMO_TYPE)
+
+        if isinstance(_type, (list, tuple)):
+            _type = _type[0]['value'] if _type else None
+
+        if not _type:
+            edge = isinstance(entity, type) and issubclass(entity, Edge)
+            _type = 'edge' if edge else 'vertex'
+
+        return (_type, str(_id))
+
+    @staticmethod
+    def key(entity):
+        if not entity[GIZMO_ID]:
+            return None
+
+        return (entity[GIZMO_TYPE], str(entity[GIZMO_ID]))
+
+    def get(self, key):
+        if key is None:
+            return None
+
+        return self._entities.get(key)
+
+    def add(self, entity):
+        """maps the entity unless another instance already is, returns the
+        instance that is mapped"""
+        key = self.key(entity)
+
+        if key is None:
+            return entity
+
+        return self._entities.setdefault(key, entity)
+
+    def discard(self, entity):
+        self._entities.pop(self.key(entity), None)
+
+    def clear(self):
+        self._entities.clear()
+
+    def __contains__(self, entity):
+        key = self.key(entity)
+
+        return key is not None and self._entities.get(key) is entity
+
+    def __len__(self):
+        return len(self._entities)
+
+
+class DataLoader(object):
+    """coalesces the keys passed to load within the same tick of the event
+    loop into a single call to batch_load. batch_load is a coroutine
+    function that is given the list of unique keys and returns a list of
+    results in the same order, a result that is an exception is raised to
+    the callers waiting on its key. max_batch_size splits large batches and
+    cache=True keeps the results for keys that are loaded again
+    """
+
+    def __init__(self, batch_load, max_batch_size=None, cache=False):
+        self.batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        self.cache = cache
+        self._cached = {}
+        self._queue = OrderedDict()
+        self._tasks = set()
+
+    def load(self, key):
+        """returns a future for the key's result"""
+        future = self._cached.get(key) or self._queue.get(key)
+
+        if future is not None:
+            return future
+
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        if not self._queue:
+            loop.call_soon(self._dispatch)
+
+        self._queue[key] = future
+
+        if self.cache:
+            self._cached[key] = future
+
+        return future
+
+    async def load_many(self, keys):
+        return await asyncio.gather(*[self.load(key) for key in keys])
+
+    def clear(self, key=None):
+        if key is None:
+            self._cached.clear()
+        else:
+            self._cached.pop(key, None)
+
+    def _dispatch(self):
+        queue = list(self._queue.items())
+        size = self.max_batch_size or len(queue)
+        self._queue = OrderedDict()
+
+        # the loop only keeps weak references to its tasks, a pending batch
+        # is held here until it is done
+        for i in range(0, len(queue), size):
+            task = asyncio.ensure_future(self._load_batch(queue[i:i + size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, batch):
+        keys = [key for key, future in batch]
+
+        try:
+            results = await self.batch_load(keys)
+
+            if len(results) != len(keys):
+                error = ('The batch load function returned {} results for'
+                         ' {} keys').format(len(results), len(keys))
+                logger.exception(error)
+                raise AstronomerMapperException(error)
+        except Exception as e:
+            results = [e] * len(keys)
+
+        for (key, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                self._cached.pop(key, None)
+
+                if not future.done():
+                    future.set_exception(result)
+            elif not future.done():
+                future.set_result(result)
+
+
 class Traversal(Gremlin):
     """
     class used to start a traversal query based on a given entity
@@ -1082,6 +2069,10 @@ class Traversal(Gremlin):
         self._mapper = mapper
         self._entity = entity
         self._collection = None
+        self._cache_key = None
+        self._lookup = None
+        self._label = None
+        self._query_cache_options = None
         _id = None
         _base = isinstance(entity, _Entity)
 
@@ -1089,9 +2080,16 @@ class Traversal(Gremlin):
             ev, _id = entity.get_rep()
 
         if _id:
-            bound_id = next_param('{}_EYE_DEE'.format(str(entity)), _id)
+            bound_id = mapper.namespace.next_param(
+                '{}_EYE_DEE'.format(str(entity)), _id)
 
             getattr(self, ev)(bound_id)
+
+            # remembered to tell a plain id lookup, which can be answered by
+            # the mapper's entity cache, from a longer traversal
+            self._label = entity[GIZMO_LABEL[0]]
+            self._cache_key = (self._label, _id)
+            self._lookup = self.bottom
         else:
             if _base:
                 _type = entity.__class__.__name__
@@ -1100,6 +2098,7 @@ class Traversal(Gremlin):
                 ev, _ = entity().get_rep()
 
             _type = camel_to_underscore(_type)
+            self._label = _type
             bound_type = self.bind_param(_type, 'BOUND_TYPE')
 
             getattr(self, ev)().hasLabel(bound_type[0])
@@ -1117,8 +2116,85 @@ class Traversal(Gremlin):
 
             raise StopAsyncIteration()
 
-    async def to_collection(self):
+    def cached(self, ttl=None, tags=None):
+        """answers the traversal from the mapper's QueryCache, when it has
+        one. ttl overrides the cache's and tags, the labels whose saves and
+        deletes invalidate the result, default to the label the traversal
+        starts from"""
+        if tags is None:
+            tags = [self._label] if self._label else []
+
+        self._query_cache_options = {'ttl': ttl, 'tags': tags}
+
+        return self
+
+    async def to_collection(self, snapshot=True):
         if not self._collection:
-            self._collection = await self._mapper.query(gremlin=self)
+            cache = self._mapper.entity_cache
+            query_cache = self._mapper.query_cache
+
+            if query_cache is not None and \
+                    self._query_cache_options is not None:
+                self._collection = await self._cached_query(query_cache,
+                                                            snapshot)
+            elif cache is not None and self._is_lookup():
+                self._collection = await self._cached_collection(cache,
+                                                                 snapshot)
+            else:
+                self._collection = await self._mapper.query(
+                    gremlin=self, snapshot=snapshot)
 
         return self._collection
+
+    async def _cached_query(self, cache, snapshot):
+        key = cache.key(str(self), self.bound_params)
+        loaded = []
+
+        async def load():
+            collection = await self._mapper.query(gremlin=self,
+                                                  snapshot=snapshot)
+            loaded.append(collection)
+
+            return collection.response.result
+
+        result = await cache.fetch(key, load, **self._query_cache_options)
+
+        if loaded:
+            return loaded[0]
+
+        self.reset()
+
+        # the result is a private copy, so the response can hand out its
+        # members without copying them again
+        return Collection(self._mapper,
+                          Response(result=result, copy_on_write=True),
+                          snapshot=snapshot)
+
+    def _is_lookup(self):
+        return self._lookup is not None and self.bottom is self._lookup
+
+    async def _cached_collection(self, cache, snapshot):
+        payload = cache.get(*self._cache_key)
+
+        if payload is not None:
+            self.reset()
+
+            # the payload is the cache's copy for this lookup alone
+            return Collection(self._mapper,
+                              Response(result={'data': [payload]},
+                                       copy_on_write=True),
+                              snapshot=snapshot)
+
+        generation = cache.generation()
+        collection = await self._mapper.query(gremlin=self,
+                                              snapshot=snapshot)
+
+        if len(collection) == 1:
+            cache.set(*self._cache_key, collection.response.data[0],
+                      generation=generation)
+
+        return collection
+
+    def stream(self, prefetch=2, snapshot=True):
+        return self._mapper.stream(gremlin=self, prefetch=prefetch,
+                                   snapshot=snapshot)
@@ -0,0 +1,373 @@
+import asyncio
+import unittest
+
+from gremlinpy.gremlin import Gremlin
+
+from gizmo.cache import *
+from gizmo.connection import Response
+from gizmo.entity import GenericVertex
+from gizmo.mapper import Mapper
+from gizmo.util import GIZMO_ID
+
+
+class TestClock:
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLookupRequest:
+    """answers every script with the same vertex and records the scripts"""
+
+    def __init__(self):
+        self.sent = []
+        self.name = 'first'
+
+    async def send(self, script, params=None, update_entities=None):
+        self.sent.append((script, params))
+
+        await asyncio.sleep(0)
+        data = [{'id': '1', 'label': 'generic_vertex', 'type': 'vertex',
+                 'properties': {'name': [{'id': 2, 'value': self.name}]}}]
+
+        for variable, entity in (update_entities or {}).items():
+            data = [{variable: {'id': entity[GIZMO_ID] or '1',
+                                'label': 'generic_vertex', 'type': 'vertex',
+                                'properties': {}}}]
+
+        return Response(result={'data': data},
+                        update_entities=update_entities)
+
+
+class EntityCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = TestClock()
+        self.cache = EntityCache(max_size=2, ttl=10, clock=self.clock)
+
+    def test_can_count_hits_and_misses(self):
+        self.assertIsNone(self.cache.get('user', 1))
+
+        self.cache.set('user', 1, {'name': 'a'})
+
+        self.assertEqual({'name': 'a'}, self.cache.get('user', '1'))
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+        self.assertEqual(0.5, self.cache.stats['hit_rate'])
+
+    def test_can_evict_least_recently_used_entries(self):
+        self.cache.set('user', 1, {})
+        self.cache.set('user', 2, {})
+        self.cache.get('user', 1)
+        self.cache.set('user', 3, {})
+
+        self.assertIsNone(self.cache.get('user', 2))
+        self.assertIsNotNone(self.cache.get('user', 1))
+        self.assertEqual(1, self.cache.evictions)
+
+    def test_can_expire_entries(self):
+        self.cache.set('user', 1, {})
+        self.clock.now = 9
+
+        self.assertIsNotNone(self.cache.get('user', 1))
+
+        self.clock.now = 10
+
+        self.assertIsNone(self.cache.get('user', 1))
+        self.assertEqual(0, len(self.cache))
+
+    def test_cannot_change_cached_payloads_through_results(self):
+        payload = {'meta': [{'value': {'a': 1}}]}
+        self.cache.set('user', 1, payload)
+        payload['meta'][0]['value']['a'] = 2
+        self.cache.get('user', 1)['meta'][0]['value']['a'] = 3
+
+        self.assertEqual(1, self.cache.get('user', 1)['meta'][0]['value']['a'])
+
+    def test_cannot_store_payloads_read_before_an_invalidation(self):
+        generation = self.cache.generation()
+        self.cache.invalidate('user', 1)
+        self.cache.set('user', 1, {}, generation=generation)
+        self.cache.set('user', 2, {}, generation=generation)
+
+        self.assertIsNone(self.cache.get('user', 1))
+        self.assertIsNotNone(self.cache.get('user', 2))
+
+        self.cache.clear()
+        self.cache.set('user', 2, {}, generation=generation)
+
+        self.assertEqual(0, len(self.cache))
+
+
+class MapperEntityCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.request = TestLookupRequest()
+        self.cache = EntityCache()
+        self.mapper = Mapper(self.request, Gremlin(), entity_cache=self.cache)
+        self.ioloop = asyncio.get_event_loop()
+
+    def lookup(self, entity):
+        return self.mapper.start(entity).to_collection()
+
+    def test_can_answer_id_lookups_from_the_cache(self):
+        user = GenericVertex({'id': '1'})
+
+        async def test():
+            first = (await self.lookup(user)).first()
+            collection = await self.lookup(user)
+            second = collection.first()
+
+            self.assertEqual(1, len(self.request.sent))
+            self.assertEqual(['first'], second['name'].values)
+            self.assertIsNot(first, second)
+            self.assertTrue(collection.response.copy_on_write)
+            self.assertEqual(1, self.cache.hits)
+            self.assertEqual(1, self.cache.misses)
+
+            await self.mapper.start(user).out().to_collection()
+
+            self.assertEqual(2, len(self.request.sent))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_invalidate_saved_and_deleted_entities(self):
+        user = GenericVertex({'id': '1'})
+
+        async def test():
+            await self.lookup(user)
+            self.request.name = 'second'
+
+            self.mapper.save(user)
+            await self.mapper.send()
+
+            self.assertEqual(0, len(self.cache))
+            self.assertEqual(['second'],
+                             (await self.lookup(user)).first()['name'].values)
+
+            self.mapper.delete(user)
+            await self.mapper.send()
+
+            self.assertEqual(0, len(self.cache))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_cannot_cache_lookups_invalidated_while_in_flight(self):
+        user = GenericVertex({'id': '1'})
+
+        async def write():
+            while not self.request.sent:
+                await asyncio.sleep(0)
+
+            self.cache.invalidate_entity(user)
+
+        async def test():
+            await asyncio.gather(self.lookup(user), write())
+
+            self.assertEqual(0, len(self.cache))
+
+        self.ioloop.run_until_complete(test())
+
+
+class QueryCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = TestClock()
+        self.cache = QueryCache(max_bytes=2000, ttl=10, clock=self.clock)
+        self.ioloop = asyncio.get_event_loop()
+        self.loads = 0
+
+    async def load(self):
+        self.loads += 1
+
+        await asyncio.sleep(0)
+
+        return {'data': [self.loads]}
+
+    def test_can_key_queries_by_their_canonical_form(self):
+        mapper = Mapper(TestLookupRequest(), Gremlin())
+
+        def traversal(label):
+            trav = mapper.start(GenericVertex).out(label)
+
+            return QueryCache.key(str(trav), trav.bound_params)
+
+        self.assertEqual(traversal('knows'), traversal('knows'))
+        self.assertNotEqual(traversal('knows'), traversal('likes'))
+        self.assertEqual(('g.V(gizmo_param_0).has(gizmo_param_1)',
+                          (('a', ), frozenset([('b', 1)]))),
+                         QueryCache.key('g.V(x_1).has(x_10)',
+                                        {'x_1': ['a'], 'x_10': {'b': 1}}))
+
+    def test_can_expire_entries_by_their_own_ttl(self):
+        self.cache.set('short', {'data': []}, ttl=1)
+        self.cache.set('long', {'data': []})
+        self.clock.now = 5
+
+        self.assertIsNone(self.cache.get('short'))
+        self.assertEqual({'data': []}, self.cache.get('long'))
+
+    def test_can_bound_the_memory_of_the_results(self):
+        self.cache.set('a', {'data': ['a' * 500]})
+        self.cache.set('b', {'data': ['b' * 500]})
+        self.cache.set('c', {'data': ['c' * 500]})
+        self.cache.set('big', {'data': ['d' * 5000]})
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('big'))
+        self.assertIsNotNone(self.cache.get('c'))
+        self.assertLessEqual(self.cache.size, self.cache.max_bytes)
+
+    def test_can_invalidate_entries_by_tag(self):
+        self.cache.set('users', {'data': []}, tags=['user'])
+        self.cache.set('both', {'data': []}, tags=['user', 'city'])
+        self.cache.set('cities', {'data': []}, tags=['city'])
+        self.cache.invalidate_tags(['user'])
+
+        self.assertEqual(1, len(self.cache))
+        self.assertIsNotNone(self.cache.get('cities'))
+
+    def test_can_share_one_load_between_concurrent_fetches(self):
+
+        async def test():
+            results = await asyncio.gather(*[self.cache.fetch('q', self.load)
+                                             for i in range(3)])
+            again = await self.cache.fetch('q', self.load)
+
+            self.assertEqual([{'data': [1]}] * 3, results)
+            self.assertEqual({'data': [1]}, again)
+            self.assertEqual(1, self.loads)
+            self.assertEqual(2, self.cache.shared)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_cannot_cache_failed_loads(self):
+
+        async def fail():
+            await asyncio.sleep(0)
+
+            raise ValueError()
+
+        async def test():
+            results = await asyncio.gather(self.cache.fetch('q', fail),
+                                           self.cache.fetch('q', fail),
+                                           return_exceptions=True)
+
+            self.assertTrue(all(isinstance(r, ValueError) for r in results))
+            self.assertEqual(0, len(self.cache))
+            self.assertEqual({'data': [1]},
+                             await self.cache.fetch('q', self.load))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_cannot_store_results_invalidated_while_loading(self):
+        loading = asyncio.Event()
+        written = asyncio.Event()
+
+        async def load():
+            loading.set()
+
+            await written.wait()
+
+            return {'data': ['stale']}
+
+        async def write():
+            await loading.wait()
+            self.cache.invalidate_tags(['city'])
+            self.cache.invalidate_tags(['user'])
+            written.set()
+
+        async def test():
+            result, _ = await asyncio.gather(
+                self.cache.fetch('q', load, tags=['user']), write())
+
+            self.assertEqual({'data': ['stale']}, result)
+            self.assertEqual(0, len(self.cache))
+
+            await self.cache.fetch('q', self.load, tags=['user'])
+
+            self.assertEqual(1, len(self.cache))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_load_again_when_the_loading_caller_is_cancelled(self):
+        loading = asyncio.Event()
+
+        async def hang():
+            loading.set()
+
+            await asyncio.sleep(10)
+
+        async def test():
+            leader = asyncio.ensure_future(self.cache.fetch('q', hang))
+
+            await loading.wait()
+
+            follower = asyncio.ensure_future(self.cache.fetch('q', self.load))
+
+            await asyncio.sleep(0)
+            leader.cancel()
+
+            self.assertEqual({'data': [1]}, await follower)
+            self.assertTrue(leader.cancelled())
+            self.assertEqual(1, len(self.cache))
+
+        self.ioloop.run_until_complete(test())
+
+
+class TraversalQueryCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.request = TestLookupRequest()
+        self.cache = QueryCache()
+        self.mapper = Mapper(self.request, Gremlin(), query_cache=self.cache)
+        self.ioloop = asyncio.get_event_loop()
+
+    def traversal(self):
+        return self.mapper.start(GenericVertex).out('knows')
+
+    def test_can_answer_opted_in_traversals_from_the_cache(self):
+
+        async def test():
+            concurrent = await asyncio.gather(
+                self.traversal().cached().to_collection(),
+                self.traversal().cached().to_collection())
+            cached = await self.traversal().cached().to_collection()
+
+            self.assertEqual(1, len(self.request.sent))
+            self.assertEqual(['first'], cached.first()['name'].values)
+            self.assertEqual(1, len(concurrent[1]))
+
+            await self.traversal().to_collection()
+
+            self.assertEqual(2, len(self.request.sent))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_invalidate_traversals_when_tagged_labels_are_saved(self):
+        user = GenericVertex({'id': '1'})
+
+        async def test():
+            await self.traversal().cached().to_collection()
+            await self.mapper.start(GenericVertex).out('likes').cached(
+                tags=['other']).to_collection()
+
+            self.assertEqual(2, len(self.cache))
+
+            self.mapper.save(user)
+            await self.mapper.send()
+
+            self.assertEqual(1, len(self.cache))
+
+            await self.traversal().cached().to_collection()
+
+            self.assertEqual(4, len(self.request.sent))
+
+        self.ioloop.run_until_complete(test())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,842 @@
+import asyncio
+import collections
+import unittest
+import json
+
+from random import random
+
+from datetime import datetime, timezone
+
+from gizmo.connection import (ConnectionPool, GraphSONCodec, GraphSONReader,
+                              JSONCodec, OrjsonCodec, Request,
+                              RequestQueryLogger, Response, ResponseStatus,
+                              REQUEST_PHASES)
+from gizmo.exception import AstronomerConnectionException
+from gizmo import util
+
+
+class TestWebSocket:
+    """stand-in for a websocket connection. Every message that is sent is
+    answered with the `data` binding (or the script when there isn't one),
+    split into 206 frames of batch_size followed by a terminal 200 frame"""
+
+    def __init__(self, alive=True, batch_size=None):
+        self.alive = alive
+        self.batch_size = batch_size
+        self.closed = False
+        self.sent = []
+        self.pings = 0
+        self.responses = collections.deque()
+
+    async def send(self, message):
+        self.sent.append(message)
+        message = json.loads(message)
+        bindings = message['args']['bindings'] or {}
+        data = bindings.get('data', [message['args']['gremlin']])
+        size = self.batch_size or len(data) or 1
+        batches = [data[i:i + size] for i in range(0, len(data), size)]
+
+        for i, batch in enumerate(batches or [[]]):
+            code = 200 if i == len(batches) - 1 else 206
+
+            self.responses.append(json.dumps({
+                'requestId': message['requestId'],
+                'status': {'code': code, 'message': '', 'attributes': {}},
+                'result': {'data': batch, 'meta': {}},
+            }))
+
+    async def recv(self):
+        return self.responses.popleft()
+
+    async def ping(self):
+        self.pings += 1
+        pong = asyncio.get_event_loop().create_future()
+
+        if self.alive:
+            pong.set_result(0)
+        else:
+            pong.set_exception(Exception('dead'))
+
+        return pong
+
+    async def close(self):
+        self.closed = True
+
+
+class TestMultiplexWebSocket(TestWebSocket):
+    """answers messages through a queue so that tests can control the order
+    in which responses arrive. When hold is set, responses are only queued
+    once respond is called"""
+
+    def __init__(self, hold=False):
+        super().__init__()
+        self.hold = hold
+        self.frames = asyncio.Queue()
+
+    async def send(self, message):
+        self.sent.append(message)
+
+        if not self.hold:
+            self.respond(message)
+
+    async def recv(self):
+        frame = await self.frames.get()
+
+        if isinstance(frame, Exception):
+            raise frame
+
+        return frame
+
+    def respond(self, message, code=200, data=None):
+        message = json.loads(message)
+        data = data if data is not None else [message['args']['gremlin']]
+
+        self.frames.put_nowait(json.dumps({
+            'requestId': message['requestId'],
+            'status': {'code': code, 'message': '', 'attributes': {}},
+            'result': {'data': data, 'meta': {}},
+        }))
+
+
+class TestRequest(Request):
+
+    def __init__(self, *args, hold=False, batch_size=None, **kwargs):
+        self.opened = []
+        self.hold = hold
+        self.batch_size = batch_size
+
+        super().__init__('localhost', *args, **kwargs)
+
+    async def connect(self):
+        if self.multiplexer is not None:
+            ws = TestMultiplexWebSocket(hold=self.hold)
+        else:
+            ws = TestWebSocket(batch_size=self.batch_size)
+
+        self.opened.append(ws)
+
+        return ws
+
+
+class CountingCodec(JSONCodec):
+
+    def __init__(self):
+        self.encoded = 0
+        self.decoded = 0
+
+    def encode(self, message):
+        self.encoded += 1
+
+        return super().encode(message)
+
+    def decode(self, frame):
+        self.decoded += 1
+
+        return super().decode(frame)
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ConnectionPoolTests(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.opened = []
+        self.ioloop = asyncio.get_event_loop()
+
+    async def connect(self):
+        ws = TestWebSocket()
+        self.opened.append(ws)
+
+        return ws
+
+    def test_cannot_create_pool_with_bad_sizes(self):
+        self.assertRaises(AstronomerConnectionException, ConnectionPool,
+            self.connect, max_size=0)
+        self.assertRaises(AstronomerConnectionException, ConnectionPool,
+            self.connect, min_size=3, max_size=2)
+
+    def test_can_fill_pool_to_min_size_on_first_acquire(self):
+        pool = ConnectionPool(self.connect, min_size=3, max_size=5)
+
+        async def test():
+            ws = await pool.acquire()
+
+            self.assertEqual(3, pool.size)
+            self.assertEqual(2, pool.idle)
+            self.assertIn(ws, self.opened)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_reuse_released_connection(self):
+        pool = ConnectionPool(self.connect)
+
+        async def test():
+            ws = await pool.acquire()
+            await pool.release(ws)
+            ws2 = await pool.acquire()
+
+            self.assertIs(ws, ws2)
+            self.assertEqual(1, len(self.opened))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_bound_connections_and_wait_for_release(self):
+        pool = ConnectionPool(self.connect, max_size=1)
+
+        async def test():
+            ws = await pool.acquire()
+            waiting = asyncio.ensure_future(pool.acquire())
+
+            await asyncio.sleep(0)
+            self.assertFalse(waiting.done())
+
+            await pool.release(ws)
+            ws2 = await waiting
+
+            self.assertIs(ws, ws2)
+            self.assertEqual(1, pool.size)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_pass_wakeup_on_when_woken_waiter_is_cancelled(self):
+        pool = ConnectionPool(self.connect, max_size=1)
+
+        async def test():
+            ws = await pool.acquire()
+            first = asyncio.ensure_future(pool.acquire())
+            second = asyncio.ensure_future(pool.acquire())
+
+            await asyncio.sleep(0)
+            await pool.release(ws)
+            first.cancel()
+
+            ws2 = await asyncio.wait_for(second, 1)
+
+            self.assertTrue(first.cancelled())
+            self.assertIs(ws, ws2)
+            self.assertEqual(1, pool.size)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_discard_connection_and_open_a_new_one(self):
+        pool = ConnectionPool(self.connect, max_size=1)
+
+        async def test():
+            ws = await pool.acquire()
+            await pool.release(ws, discard=True)
+            ws2 = await pool.acquire()
+
+            self.assertTrue(ws.closed)
+            self.assertIsNot(ws, ws2)
+            self.assertEqual(1, pool.size)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_close_idle_connections_above_min_size(self):
+        pool = ConnectionPool(self.connect, min_size=1, max_size=2,
+                              idle_timeout=0)
+
+        async def test():
+            ws1 = await pool.acquire()
+            ws2 = await pool.acquire()
+            await pool.release(ws1)
+            await pool.release(ws2)
+            await pool.acquire()
+
+            self.assertTrue(ws1.closed)
+            self.assertEqual(1, pool.size)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_replace_connection_that_fails_health_check(self):
+        pool = ConnectionPool(self.connect, ping_interval=0)
+
+        async def test():
+            ws = await pool.acquire()
+            await pool.release(ws)
+            ws.alive = False
+            ws2 = await pool.acquire()
+
+            self.assertEqual(1, ws.pings)
+            self.assertTrue(ws.closed)
+            self.assertIsNot(ws, ws2)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_borrow_connection_with_context_manager(self):
+        pool = ConnectionPool(self.connect)
+
+        async def test():
+            async with pool.connection() as ws:
+                self.assertEqual(0, pool.idle)
+
+            self.assertEqual(1, pool.idle)
+            self.assertFalse(ws.closed)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_cannot_acquire_from_closed_pool(self):
+        pool = ConnectionPool(self.connect)
+
+        async def test():
+            ws = await pool.acquire()
+            await pool.release(ws)
+            await pool.close()
+
+            self.assertTrue(ws.closed)
+            await pool.acquire()
+
+        self.assertRaises(AstronomerConnectionException,
+            self.ioloop.run_until_complete, test())
+
+
+class RequestTests(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ioloop = asyncio.get_event_loop()
+
+    def test_can_send_multiple_requests_over_one_connection(self):
+        request = TestRequest()
+
+        async def test():
+            for i in range(5):
+                script = 'x = {}'.format(random())
+                response = await request.send(script=script)
+
+                self.assertIsInstance(response, Response)
+                self.assertEqual(script, response[0])
+
+            self.assertEqual(1, len(request.opened))
+            self.assertEqual(5, len(request.opened[0].sent))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_wrap_connection_errors(self):
+        request = TestRequest()
+
+        async def connect():
+            raise OSError('refused')
+
+        request.pool._connect = connect
+
+        async def test():
+            await request.send(script='some script')
+
+        self.assertRaises(AstronomerConnectionException,
+            self.ioloop.run_until_complete, test())
+
+
+    def test_does_not_render_query_when_nothing_consumes_it(self):
+        request = TestRequest()
+        rendered = []
+        query_debug = util._query_debug
+
+        def count(script, params):
+            rendered.append(script)
+
+            return query_debug(script, params)
+
+        async def test():
+            await request.send(script='g.V(x)', params={'x': 1})
+
+            self.assertEqual([], rendered)
+
+            request.request_logger = RequestQueryLogger()
+            await request.send(script='g.V(x)', params={'x': 1})
+
+            self.assertEqual(['g.V(x)'], rendered)
+            self.assertEqual("g.V('1')",
+                request.request_logger.queries[0]['query'])
+
+        util._query_debug = count
+
+        try:
+            self.ioloop.run_until_complete(test())
+        finally:
+            util._query_debug = query_debug
+
+    def test_can_log_phase_timings(self):
+        request = TestRequest(log_requests=True, batch_size=1)
+
+        async def test():
+            response = await request.send(script='g.V()',
+                                          params={'data': ['a', 'b']})
+            timings = request.request_logger.queries[0]['timings']
+
+            self.assertEqual(set(REQUEST_PHASES), set(timings))
+            self.assertIsNone(timings['server'])
+            self.assertIs(timings, response.timings)
+
+            for phase in REQUEST_PHASES:
+                if phase != 'server':
+                    self.assertGreaterEqual(timings[phase], 0)
+
+            self.assertGreater(timings['decode'], 0)
+            self.assertGreater(timings['serialize'], 0)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_log_phase_timings_when_multiplexed(self):
+        request = TestRequest(log_requests=True, multiplex=True)
+
+        async def test():
+            await request.send(script='g.V()')
+            timings = request.request_logger.queries[0]['timings']
+
+            self.assertGreater(timings['acquire'], 0)
+            self.assertGreater(timings['decode'], 0)
+            self.assertEqual(0, request.multiplexer.in_flight)
+
+            await request.close()
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_read_server_reported_time(self):
+        request_logger = RequestQueryLogger(server_time_attributes=['time'])
+        status = ResponseStatus(200, '', {'time': '12.5'})
+
+        self.assertEqual(12.5, request_logger.server_time(status))
+        self.assertIsNone(request_logger.server_time(
+            ResponseStatus(200, '', {})))
+
+    def test_can_get_percentiles_across_queries(self):
+        request_logger = RequestQueryLogger()
+
+        for i in range(1, 101):
+            request_logger.add('script', {}, 'query', i,
+                               {'decode': i / 10.0, 'server': None})
+
+        execution = request_logger.percentiles()
+        decode = request_logger.percentiles('decode', percentiles=(50, ))
+        summary = request_logger.summary()
+
+        self.assertAlmostEqual(50.5, execution[50])
+        self.assertAlmostEqual(95.05, execution[95])
+        self.assertAlmostEqual(99.01, execution[99])
+        self.assertAlmostEqual(5.05, decode[50])
+        self.assertEqual({50: None, 95: None, 99: None}, summary['server'])
+        self.assertEqual(execution, summary['execution_time'])
+
+    def test_can_reuse_compiled_debug_patterns(self):
+        util._debug_pattern.cache_clear()
+        util._query_debug('g.V(x)', {'x': 1})
+        util._query_debug('g.V(x).has(y)', {'x': 2})
+
+        self.assertEqual(1, util._debug_pattern.cache_info().hits)
+
+    def test_can_encode_and_decode_with_a_custom_codec(self):
+        codec = CountingCodec()
+        request = TestRequest(codec=codec, batch_size=2)
+
+        async def test():
+            response = await request.send(script='g.V()',
+                                          params={'data': ['a', 'b', 'c']})
+
+            self.assertEqual(['a', 'b', 'c'], response.data)
+            self.assertEqual(1, codec.encoded)
+            self.assertEqual(2, codec.decoded)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_decode_multiplexed_frames_with_a_custom_codec(self):
+        codec = CountingCodec()
+        request = TestRequest(codec=codec, multiplex=True)
+
+        async def test():
+            response = await request.send(script='g.V()')
+
+            self.assertEqual('g.V()', response[0])
+            self.assertEqual(1, codec.encoded)
+            self.assertEqual(1, codec.decoded)
+
+            await request.close()
+
+        self.ioloop.run_until_complete(test())
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_can_send_with_orjson_codec(self):
+        request = TestRequest(codec=OrjsonCodec())
+
+        async def test():
+            response = await request.send(script='g.V()',
+                                          params={'data': [{'id': 1}]})
+            sent = request.opened[0].sent[0]
+
+            self.assertIsInstance(sent, str)
+            self.assertEqual(1, response[0]['id'])
+
+        self.ioloop.run_until_complete(test())
+
+
+class MultiplexedRequestTests(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ioloop = asyncio.get_event_loop()
+
+    def test_can_share_one_connection_between_concurrent_requests(self):
+        request = TestRequest(multiplex=True)
+
+        async def test():
+            scripts = ['x = {}'.format(random()) for i in range(10)]
+            responses = await asyncio.gather(*[request.send(script=s)
+                for s in scripts])
+
+            self.assertEqual(1, len(request.opened))
+            self.assertEqual(0, request.multiplexer.in_flight)
+
+            for script, response in zip(scripts, responses):
+                self.assertEqual(script, response[0])
+
+            await request.close()
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_route_out_of_order_responses_by_request_id(self):
+        request = TestRequest(multiplex=True, hold=True)
+
+        async def test():
+            first = asyncio.ensure_future(request.send(script='first'))
+            second = asyncio.ensure_future(request.send(script='second'))
+
+            while len(request.opened) == 0 or len(request.opened[0].sent) < 2:
+                await asyncio.sleep(0)
+
+            ws = request.opened[0]
+            ws.respond(ws.sent[1])
+            second_response = await second
+
+            self.assertEqual('second', second_response[0])
+            self.assertFalse(first.done())
+
+            ws.respond(ws.sent[0])
+            first_response = await first
+
+            self.assertEqual('first', first_response[0])
+
+            await request.close()
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_collect_partial_content_frames(self):
+        request = TestRequest(multiplex=True, hold=True)
+
+        async def test():
+            sent = asyncio.ensure_future(request.send(script='x'))
+
+            while len(request.opened) == 0 or not request.opened[0].sent:
+                await asyncio.sleep(0)
+
+            ws = request.opened[0]
+            ws.respond(ws.sent[0], code=206, data=['a', 'b'])
+            ws.respond(ws.sent[0], code=200, data=['c'])
+            response = await sent
+
+            self.assertEqual(['a', 'b', 'c'], response.data)
+            self.assertEqual(200, response.status.code)
+
+            await request.close()
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_fail_in_flight_requests_and_reconnect(self):
+        request = TestRequest(multiplex=True, hold=True)
+
+        async def test():
+            sent = asyncio.ensure_future(request.send(script='x'))
+
+            while len(request.opened) == 0 or not request.opened[0].sent:
+                await asyncio.sleep(0)
+
+            request.opened[0].frames.put_nowait(Exception('dropped'))
+
+            with self.assertRaises(AstronomerConnectionException):
+                await sent
+
+            self.assertTrue(request.opened[0].closed)
+
+            request.hold = False
+            response = await request.send(script='y')
+
+            self.assertEqual(2, len(request.opened))
+            self.assertEqual('y', response[0])
+
+            await request.close()
+
+        self.ioloop.run_until_complete(test())
+
+
+class StreamingRequestTests(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ioloop = asyncio.get_event_loop()
+        self.data = ['v{}'.format(i) for i in range(10)]
+
+    def test_can_send_and_collect_all_partial_content_frames(self):
+        request = TestRequest(batch_size=3)
+
+        async def test():
+            response = await request.send(script='g.V()',
+                                          params={'data': self.data})
+
+            self.assertEqual(self.data, response.data)
+            self.assertEqual(200, response.status.code)
+            self.assertEqual(1, request.pool.idle)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_stream_batches(self):
+        request = TestRequest(batch_size=3)
+
+        async def test():
+            batches = []
+            stream = request.stream(script='g.V()', params={'data': self.data})
+
+            async for batch in stream:
+                self.assertIsInstance(batch, Response)
+                batches.append(batch.data)
+
+            self.assertEqual([self.data[0:3], self.data[3:6], self.data[6:9],
+                self.data[9:]], batches)
+            self.assertEqual(200, stream.status.code)
+            self.assertEqual(1, request.pool.idle)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_discard_connection_when_stream_is_closed_early(self):
+        request = TestRequest(batch_size=3)
+
+        async def test():
+            async with request.stream(script='g.V()',
+                                      params={'data': self.data}) as stream:
+                async for batch in stream:
+                    break
+
+            self.assertEqual(0, request.pool.size)
+            self.assertTrue(request.opened[0].closed)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_stream_batches_over_multiplexed_connection(self):
+        request = TestRequest(multiplex=True, hold=True)
+
+        async def test():
+            stream = request.stream(script='g.V()')
+            first = asyncio.ensure_future(stream.__anext__())
+
+            while len(request.opened) == 0 or not request.opened[0].sent:
+                await asyncio.sleep(0)
+
+            ws = request.opened[0]
+            ws.respond(ws.sent[0], code=206, data=['a', 'b'])
+            ws.respond(ws.sent[0], code=200, data=['c'])
+            batches = [(await first).data]
+
+            async for batch in stream:
+                batches.append(batch.data)
+
+            self.assertEqual([['a', 'b'], ['c']], batches)
+            self.assertEqual(0, request.multiplexer.in_flight)
+
+            await request.close()
+
+        self.ioloop.run_until_complete(test())
+
+
+class CountingResponse(Response):
+
+    def translate(self):
+        self.translations = getattr(self, 'translations', 0) + 1
+
+        return super().translate()
+
+
+def typed(graphson_type, value):
+    return {'@type': graphson_type, '@value': value}
+
+
+TYPED_VERTEX = typed('g:Vertex', {
+    'id': typed('g:Int64', 1),
+    'label': 'person',
+    'properties': {
+        'name': [typed('g:VertexProperty', {
+            'id': typed('g:Int64', 10),
+            'value': 'marko',
+            'label': 'name',
+            'properties': {'since': typed('g:Int32', 2009)},
+        })],
+        'age': [typed('g:VertexProperty', {
+            'id': typed('g:Int64', 11),
+            'value': typed('g:Int32', 29),
+            'label': 'age',
+        })],
+    },
+})
+
+
+class GraphSONReaderTests(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.reader = GraphSONReader()
+
+    def test_can_read_scalar_types(self):
+        read = self.reader.read([typed('g:Int32', 1), typed('g:Double', 1.5),
+            typed('g:Double', 'NaN'), typed('g:UUID', 'a-b'),
+            typed('g:T', 'id'), typed('gx:Unknown', 'raw')])
+
+        self.assertEqual([1, 1.5], read[:2])
+        self.assertNotEqual(read[2], read[2])
+        self.assertEqual(['a-b', 'id', 'raw'], read[3:])
+
+    def test_can_read_dates(self):
+        read = self.reader.read(typed('g:Date', 1000))
+
+        self.assertEqual(datetime(1970, 1, 1, 0, 0, 1, tzinfo=timezone.utc),
+            read)
+
+    def test_can_read_graphson_three_collections(self):
+        read = self.reader.read(typed('g:Map', [
+            'names', typed('g:List', ['a', typed('g:Int32', 2)]),
+            typed('g:Int32', 1), typed('g:Set', ['b']),
+            'bulk', typed('g:BulkSet', ['c', typed('g:Int64', 2)]),
+        ]))
+
+        self.assertEqual({'names': ['a', 2], 1: ['b'], 'bulk': ['c', 'c']},
+            read)
+
+    def test_can_read_vertex_into_untyped_layout(self):
+        read = self.reader.read(TYPED_VERTEX)
+
+        self.assertEqual(1, read['id'])
+        self.assertEqual('vertex', read['type'])
+        self.assertEqual('person', read['label'])
+        self.assertEqual([{'id': 10, 'value': 'marko', 'label': 'name',
+            'properties': {'since': 2009}}], read['properties']['name'])
+        self.assertEqual(29, read['properties']['age'][0]['value'])
+
+    def test_can_read_edge_into_untyped_layout(self):
+        read = self.reader.read(typed('g:Edge', {
+            'id': typed('g:Int64', 5),
+            'label': 'knows',
+            'inV': typed('g:Int64', 2),
+            'outV': typed('g:Int64', 1),
+            'properties': {'weight': typed('g:Property', {
+                'key': 'weight', 'value': typed('g:Double', 0.5)})},
+        }))
+
+        self.assertEqual('edge', read['type'])
+        self.assertEqual(2, read['inV'])
+        self.assertEqual(1, read['outV'])
+        self.assertEqual({'weight': 0.5}, read['properties'])
+
+    def test_can_add_deserializers(self):
+        reader = GraphSONReader(deserializers={
+            'x:Point': lambda reader, value: tuple(reader.read(value))})
+        read = reader.read(typed('x:Point', [typed('g:Int32', 1), 2]))
+
+        self.assertEqual((1, 2), read)
+
+    def test_can_send_with_graphson_codec(self):
+        request = TestRequest(codec=GraphSONCodec())
+
+        async def test():
+            response = await request.send(script='g.V()',
+                                          params={'data': [TYPED_VERTEX]})
+            vertex = response[0]
+
+            self.assertEqual(1, vertex['id'])
+            self.assertEqual(29, vertex['age'][0]['value'])
+
+        asyncio.get_event_loop().run_until_complete(test())
+
+
+class ResponseTests(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.result = {'data': [{'id': i, 'label': 'v', 'type': 'vertex',
+            'properties': {'name': [{'id': i, 'value': str(random())}]}}
+                for i in range(5)]}
+
+    def test_can_translate_result_once(self):
+        response = CountingResponse(result=self.result)
+
+        for i in range(len(response.data)):
+            response[i]
+
+        self.assertEqual(5, len(response.data))
+        self.assertEqual(1, response.translations)
+
+    def test_can_retranslate_when_result_is_replaced(self):
+        response = CountingResponse(result=self.result)
+        response.result = {'data': self.result['data'][:2]}
+
+        self.assertEqual(2, len(response.data))
+        self.assertEqual(2, response.translations)
+
+    def test_can_retranslate_when_invalidated(self):
+        response = CountingResponse(result=self.result)
+        response.result['data'].pop()
+        response.invalidate()
+
+        self.assertEqual(4, len(response.data))
+        self.assertEqual(2, response.translations)
+
+    def test_can_flatten_properties_without_copying_them(self):
+        response = Response(result=self.result)
+        raw = self.result['data'][0]
+        member = response.data[0]
+
+        self.assertIs(raw['properties']['name'], member['name'])
+        self.assertNotIn('properties', member)
+        self.assertIn('properties', raw)
+        self.assertEqual('vertex', member['type'])
+
+    def test_can_copy_members_on_read(self):
+        response = Response(result=self.result)
+        member = response[0]
+        member['name'] = 'changed'
+
+        self.assertIsNot(member, response[0])
+        self.assertNotEqual('changed', response[0]['name'])
+
+    def test_can_share_members_when_copy_on_write(self):
+        response = Response(result=self.result, copy_on_write=True)
+        data = response.data
+        member = response[0]
+
+        self.assertIs(member, response[0])
+
+        response[0] = {'replaced': True}
+
+        self.assertIs(member, data[0])
+        self.assertEqual({'replaced': True}, response[0])
+
+    def test_can_copy_the_data_once_when_copy_on_write(self):
+        response = Response(result=self.result, copy_on_write=True)
+        data = response.data
+        response[0] = {'first': True}
+        copied = response.data
+        response[0] = {'second': True}
+
+        self.assertIsNot(data, copied)
+        self.assertIs(copied, response.data)
+        self.assertEqual({'second': True}, response[0])
+
+        response.invalidate()
+        translated = response.data
+        response[0] = {'third': True}
+
+        self.assertIsNot(translated, response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
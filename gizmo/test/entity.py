@@ -202,6 +202,58 @@ class EntityTests(unittest.TestCase):
         self.assertIn('diamon_field', data)
         self.assertIsInstance(ins.fields['name'], String)
 
+    def test_creating_an_edge_does_not_change_its_data(self):
+        d = {'outV': 1, 'inV': 2, 'some_field': '1'}
+        e = TestEdge(d)
+
+        self.assertEqual(1, e.outV)
+        self.assertEqual(2, e.inV)
+        self.assertEqual({'outV': 1, 'inV': 2, 'some_field': '1'}, d)
+
+    def test_entities_do_not_share_field_state(self):
+        class V(Vertex):
+            name = String()
+            meta = Map()
+            option = Option(options=['a', 'b'])
+
+        one = V({'name': 'one'})
+        two = V()
+        one['meta']['value']['key'] = 'val'
+        one['option'] = 'a'
+
+        self.assertEqual(['one'], one['name'].values)
+        self.assertEqual([], two['name'].values)
+        self.assertEqual([{}], two['meta'].values)
+        self.assertEqual([], two['option'].values)
+        self.assertIsNot(one['name'], two['name'])
+        self.assertIs(one.name, one['name'])
+
+    def test_cloned_fields_convert_with_their_own_instance(self):
+        class V(Vertex):
+            count = Integer(values='12')
+
+        field = V()['count']
+
+        self.assertIs(field, field._values._to_python.__self__)
+        self.assertEqual([12], field.values)
+
+    def test_schema_is_compiled_once_per_class(self):
+        class Base(Vertex):
+            base_field = String()
+
+        class Sub(Base):
+            sub_field = String()
+
+        Sub()
+        schema = Sub._entity_schema()
+        Sub()
+
+        self.assertIs(schema, Sub._entity_schema())
+        self.assertIsNot(schema, Base._entity_schema())
+        self.assertIn('base_field', schema.fields)
+        self.assertIn('sub_field', schema.fields)
+        self.assertNotIn('sub_field', Base._entity_schema().fields)
+
     def test_can_create_fields_from_json_gremlin_response(self):
         j = '{"requestId":"cce2b0ff-10ff-472f-847e-35c5efdd813a","status":{"message":"","code":200,"attributes":{}},"result":{"data":[{"id":4,"label":"vertex","type":"vertex","properties":{"__GIZMO_ENTITY__":[{"id":31,"value":"gizmo.test.mapper.TestVertex"}],"name":[{"id":34,"value":"mark","properties":{"age":35}}],"id":[{"id":32,"value":"0.28441421794883837"}],"type":[{"id":33,"value":"vertex"}]}}],"meta":{}}}'
         j = json.loads(j)
@@ -32,6 +32,30 @@ class FieldTests(unittest.TestCase):
         self.assertEqual(1, len(f.values))
         self.assertIn(v, f.values)
 
+    def test_fields_and_values_do_not_carry_a_dict(self):
+        f = String(values='value')
+
+        self.assertFalse(hasattr(f, '__dict__'))
+        self.assertFalse(hasattr(f._values, '__dict__'))
+        self.assertFalse(hasattr(f._values._values[0], '__dict__'))
+
+    def test_can_clone_field_subclass_with_its_own_attributes(self):
+        class Tagged(String):
+
+            def __init__(self, tag, *args, **kwargs):
+                self.tag = tag
+
+                super().__init__(*args, **kwargs)
+
+        f = Tagged(tag='tag', name='name', values='value')
+        clone = f._clone()
+        clone + 'other'
+
+        self.assertEqual('tag', clone.tag)
+        self.assertEqual('name', clone.name)
+        self.assertEqual(['value', 'other'], clone.values)
+        self.assertEqual(['value'], f.values)
+
     def test_can_create_field_with_one_callable_value(self):
         v = str(random())
         def value():
@@ -43,6 +67,43 @@ class FieldTests(unittest.TestCase):
         self.assertEqual(1, len(f.values))
         self.assertIn(v, f.values)
 
+    def test_only_callable_values_are_resolved_on_read(self):
+        v = str(random())
+        plain = Value(value=v)
+        called = Value(value=lambda: v)
+
+        self.assertIs(type(plain), Value)
+        self.assertIsNot(type(called), Value)
+        self.assertEqual(v, plain._value)
+        self.assertEqual(v, called._value)
+
+    def test_value_without_snapshot_keeps_the_value_as_initial(self):
+        initial = {'key': 'value'}
+        val = Value(value=initial, snapshot=False)
+
+        self.assertIs(initial, val._initial)
+        self.assertFalse(val.dirty)
+
+        val.value = {'key': 'changed'}
+
+        self.assertTrue(val.dirty)
+        self.assertEqual(initial, val.changes['value']['from'])
+
+    def test_can_replace_callable_value_with_plain_value(self):
+        v = str(random())
+        val = Value(value=lambda: 'called')
+        val.value = v
+
+        self.assertIs(type(val), Value)
+        self.assertFalse(val._callable)
+        self.assertEqual(v, val.value)
+
+        val.value = lambda: v
+
+        self.assertTrue(val._callable)
+        self.assertEqual(v, val.value)
+        self.assertEqual(v, val._clone().value)
+
     def test_can_create_field_without_value_with_default_callable_value(self):
         d = str(random())
         def value():
@@ -821,6 +882,19 @@ class IntegerTests(unittest.TestCase):
         self.assertEqual(f.values[0], 0)
 
 
+class TypedValueTests(unittest.TestCase):
+
+    def test_typed_values_are_returned_as_they_are(self):
+        big = 2 ** 60 + 1
+
+        self.assertEqual([big], Integer(values=big).values)
+        self.assertEqual([0.5], Float(values=0.5).values)
+        self.assertEqual([False], Boolean(values=False).values)
+        self.assertEqual(['x'], String(values='x').values)
+        self.assertEqual([3], Integer(values='3.5').values)
+        self.assertEqual([True], Boolean(values='true').values)
+
+
 class FloatTests(unittest.TestCase):
 
     def test_can_get_float_with_non_numeric_value_graph_data_type(self):
@@ -1201,6 +1275,14 @@ class OptionTests(unittest.TestCase):
         self.assertEqual(f.values[1], v2)
         self.assertEqual(2, len(f.values))
 
+    def test_cloned_option_keeps_options(self):
+        allowed = ['name']
+        f = Option(options=allowed)._clone()
+        f + 'name' + 'other'
+
+        self.assertEqual(allowed, f.options)
+        self.assertEqual(['name'], f.values)
+
     def test_cannot_add_unallowed_value(self):
         v = str(random())
         allowed = ['name']
@@ -1383,6 +1465,121 @@ class FieldManagerTests(unittest.TestCase):
         self.assertEqual(len(deleted), 1)
         self.assertEqual(len(v.changed), 2)
 
+    def test_can_get_only_the_dirty_fields(self):
+        fields = {
+            'name': String(values='name'),
+            'age': Integer(values=1),
+            'tags': String(values=['a', 'b']),
+            'email': String(),
+        }
+        v = FieldManager(fields)
+
+        self.assertEqual([], v.dirty)
+
+        v['name']['name'] = 'changed'
+        v['tags'] + 'c'
+        del v['age']
+
+        self.assertEqual(['age', 'name', 'tags'], v.dirty)
+        self.assertEqual(['age'], v.deleted)
+
+    def test_clean_fields_are_left_out_of_the_changes(self):
+        fields = {
+            'name': String(values='name'),
+            'tags': String(values=['a', 'b']),
+        }
+        v = FieldManager(fields)
+        v['tags'] + 'c'
+        changes = v.changes
+
+        self.assertNotIn('name', changes)
+        self.assertEqual(['a', 'b', 'c'], changes['tags']['values']['values'])
+        self.assertEqual('c', changes['tags']['values']['added'][0]['value'])
+
+    def test_can_track_the_fields_that_were_changed(self):
+        fields = {
+            'name': String(values='name'),
+            'age': Integer(values=1),
+            'tags': String(values=['a', 'b']),
+            'email': String(),
+        }
+        v = FieldManager(fields)
+
+        self.assertEqual({}, v._dirty)
+
+        v['name']['name'] = 'changed'
+        v['tags'] + 'c'
+        v.hydrate({'undefined': 'x', 'email': 'e'})
+
+        self.assertEqual(['name', 'tags', 'email'], list(v._dirty))
+
+    def test_can_report_defaults_and_in_place_changes(self):
+        fields = {
+            'name': String(values='name'),
+            'city': String(default='here'),
+            'meta': Map(values={'a': 1}),
+        }
+        v = FieldManager(fields)
+        v['meta'].values[0]['a'] = 2
+
+        self.assertEqual(['city', 'meta'], v.dirty)
+        self.assertEqual(['city', 'meta'], list(v.changes))
+        self.assertEqual('here',
+                         v.changes['city']['values']['added'][0]['value'])
+
+    def test_can_report_properties_set_on_existing_values(self):
+        v = FieldManager({'name': String(values='abc'),
+                          'city': String(values='here')})
+        v['name']['abc'].properties['since'] = 2010
+        del v['city']['here'].properties['since']
+
+        self.assertEqual(['name'], v.dirty)
+        self.assertEqual({'since': 2010},
+                         v.changes['name']['values']['changes'][0]
+                         ['properties'])
+
+    def test_can_watch_mutable_values_hydrated_after_tracking(self):
+        v = FieldManager({'meta': Map()})
+        v['meta']._values.hydrate({'a': 1}, reset_initial=True)
+
+        self.assertEqual([], v.dirty)
+
+        v['meta'].values[0]['a'] = 2
+
+        self.assertEqual(['meta'], v.dirty)
+
+    def test_deleting_a_value_marks_the_field_dirty(self):
+        f = String(values=['a', 'b'])
+
+        self.assertFalse(f.dirty)
+
+        del f['a']
+
+        self.assertTrue(f.dirty)
+        self.assertEqual('a', f.changes['values']['deleted'][0]['value'])
+
+    def test_can_hydrate_graphson_property_lists(self):
+        fields = {
+            'name': String(),
+            'option': Option(options=['a']),
+            'single': Field(max_values=1, overwrite_last_value=True),
+        }
+        f = FieldManager(fields)
+        f.hydrate({
+            'name': [{'id': 1, 'value': 'one', 'properties': {'p': 1}},
+                     {'id': 2, 'value': 'two'}],
+            'option': [{'id': 3, 'value': 'a'}, {'id': 4, 'value': 'b'}],
+            'single': [{'id': 5, 'value': 'x'}, {'id': 6, 'value': 'y'}],
+        })
+        name = f['name']._values._values
+
+        self.assertEqual(['one', 'two'], f['name'].values)
+        self.assertEqual([1, 2], [v.id for v in name])
+        self.assertEqual({'p': 1}, name[0].properties)
+        self.assertEqual({}, name[1].properties)
+        self.assertEqual(['a'], f['option'].values)
+        self.assertEqual(['y'], f['single'].values)
+
     def test_can_get_data_from_fields_including_immutable(self):
         iid = str(random())
         iname = 'name_' + str(random())
@@ -32,6 +32,106 @@ class TestRequest:
         pass
 
 
+class TestSaveRequest(TestRequest):
+    """answers a save script with a vertex for every entity bound to a return
+    variable, giving each an id"""
+
+    def __init__(self):
+        self.sent = []
+        self.ids = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def vertex(self, entity):
+        self.ids += 1
+
+        return {'id': str(self.ids), 'label': entity[GIZMO_LABEL[0]],
+            'type': entity[GIZMO_TYPE], 'properties': {}}
+
+    async def send(self, script, params=None, update_entities=None):
+        self.sent.append((script, params))
+        self.in_flight += 1
+        self.max_in_flight = max(self.in_flight, self.max_in_flight)
+
+        await asyncio.sleep(0)
+
+        self.in_flight -= 1
+        result = {}
+
+        for variable, entity in (update_entities or {}).items():
+            if isinstance(entity, list):
+                result[variable] = [self.vertex(e) for e in entity]
+            else:
+                result[variable] = self.vertex(entity)
+
+        return Response(result={'data': [result]},
+                        update_entities=update_entities)
+
+
+class TestResponseStream:
+    """yields a Response for each batch of vertex data and records how many
+    batches have been read from it"""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.read = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.read >= len(self.batches):
+            raise StopAsyncIteration()
+
+        batch = self.batches[self.read]
+        self.read += 1
+
+        return Response(result={'data': batch})
+
+    async def close(self):
+        self.closed = True
+
+
+class TestStreamRequest(TestRequest):
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.streams = []
+
+    def stream(self, script, params=None, *args, **kwargs):
+        stream = TestResponseStream(self.batches)
+        self.streams.append(stream)
+
+        return stream
+
+
+class TestRelatedRequest(TestRequest):
+    """answers a related entities script with a row for each of the
+    children of the requested parent ids, using the ids as they are keyed in
+    children the way a server answers with its native ids"""
+
+    def __init__(self, children):
+        self.children = children
+        self.sent = []
+
+    async def send(self, script, params=None, update_entities=None):
+        self.sent.append((script, params))
+        rows = []
+        requested = [str(_id) for _id in params['related_ids']]
+
+        for parent, children in self.children.items():
+            if str(parent) not in requested:
+                continue
+
+            for child in children:
+                rows.append({'parent': parent, 'related': {
+                    'id': child, 'label': 'vertex', 'type': 'vertex',
+                    'properties': {'name': [{'id': 1, 'value': child}]}}})
+
+        return Response(result={'data': rows})
+
+
 def get_dict_key(params, value, unset=False):
     for k, v in params.items():
         if v == value:
@@ -908,6 +1008,131 @@ class MapperTests(unittest.TestCase):
 
         self.ioloop.run_until_complete(test())
 
+    def test_can_retrieve_collection_data_concurrently_in_order(self):
+
+        class TestCaseVertexConcurrent(Vertex):
+            allow_undefined = True
+
+        in_flight = {'now': 0, 'max': 0}
+
+        class TestCaseVertexConcurrentMapper(EntityMapper):
+            entity = TestCaseVertexConcurrent
+
+            async def add_index(self, entity, data):
+                in_flight['now'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['now'])
+                index = data['index'][0]['value']
+
+                await asyncio.sleep(0.001 * (10 - index))
+                in_flight['now'] -= 1
+                data['seen'] = index
+
+                return data
+
+        resp = Response()
+        resp.result = {'data': [dict(self.mapper.create({'index': i},
+            TestCaseVertexConcurrent).data) for i in range(10)]}
+
+        async def test():
+            collection = Collection(self.mapper, resp)
+            data = await self.mapper.data(collection, 'add_index',
+                                          concurrency=3)
+
+            self.assertEqual(list(range(10)), [d['seen'] for d in data])
+            self.assertEqual(3, in_flight['max'])
+
+            self.mapper.data_concurrency = 4
+            collection = Collection(self.mapper, resp)
+            data = await collection.mapper_data
+
+            self.assertEqual(list(range(10)),
+                             [d['index'][0]['value'] for d in data])
+
+        try:
+            self.ioloop.run_until_complete(test())
+        finally:
+            self.mapper.data_concurrency = None
+
+    def test_can_aggregate_concurrent_collection_data_errors(self):
+
+        class TestCaseVertexConcurrentError(Vertex):
+            allow_undefined = True
+
+        class TestCaseVertexConcurrentErrorMapper(EntityMapper):
+            entity = TestCaseVertexConcurrentError
+
+            async def fail_odd(self, entity, data):
+                if data['index'][0]['value'] % 2:
+                    raise ValueError(data['index'][0]['value'])
+
+                return data
+
+        resp = Response()
+        resp.result = {'data': [dict(self.mapper.create({'index': i},
+            TestCaseVertexConcurrentError).data) for i in range(6)]}
+
+        async def test():
+            collection = Collection(self.mapper, resp)
+
+            with self.assertRaises(AstronomerMapperException) as context:
+                await self.mapper.data(collection, 'fail_odd',
+                                       concurrency=2)
+
+            errors = context.exception.errors
+
+            self.assertEqual([1, 3, 5], [i for i, e in errors])
+            self.assertTrue(all(isinstance(e, ValueError)
+                                for i, e in errors))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_cannot_return_cancelled_collection_data_as_results(self):
+
+        class TestCaseVertexConcurrentCancel(Vertex):
+            allow_undefined = True
+
+        class TestCaseVertexConcurrentCancelMapper(EntityMapper):
+            entity = TestCaseVertexConcurrentCancel
+
+            async def cancel_odd(self, entity, data):
+                if data['index'][0]['value'] % 2:
+                    raise asyncio.CancelledError()
+
+                return data
+
+        resp = Response()
+        resp.result = {'data': [dict(self.mapper.create({'index': i},
+            TestCaseVertexConcurrentCancel).data) for i in range(4)]}
+
+        async def test():
+            collection = Collection(self.mapper, resp)
+
+            with self.assertRaises(asyncio.CancelledError):
+                await self.mapper.data(collection, 'cancel_odd',
+                                       concurrency=2)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_hydrate_collection_without_snapshots(self):
+        meta = {'key': 'value'}
+        resp = Response()
+        resp.result = {'data': [
+            {'name': [{'id': 1, 'value': 'name'}],
+             'meta': [{'id': 2, 'value': meta}]},
+        ]}
+        collection = Collection(self.mapper, resp, snapshot=False)
+        entity = collection[0]
+
+        self.assertEqual(['name'], entity['name'].values)
+        self.assertEqual([meta], entity['meta'].values)
+
+        entity['name'] = 'changed'
+        changes = entity.changes['name']['values']
+
+        self.assertEqual(['changed'], changes['values'])
+        self.assertEqual('name', changes['deleted'][0]['value'])
+        self.assertEqual('name', resp.data[0]['name'][0]['value'])
+
     def test_can_retrieve_data_from_two_nested_entities_via_custom_mapper_methods(self):
         city = 'city-{}'.format(str(random()))
 
@@ -936,6 +1161,97 @@ class MapperTests(unittest.TestCase):
 
         self.ioloop.run_until_complete(test())
 
+    def test_can_get_entity_variable_by_identity(self):
+        entities = [self.mapper.create({'some_field': str(i)}, TestVertex)
+            for i in range(20)]
+
+        for entity in entities:
+            self.mapper.save(entity)
+
+        for entity in entities:
+            variable = self.mapper.get_entity_variable(entity)
+
+            self.assertIs(entity, self.mapper.entities[variable])
+
+        other = self.mapper.create({'some_field': '1'}, TestVertex)
+
+        self.assertIsNone(self.mapper.get_entity_variable(other))
+
+        self.mapper.reset()
+
+        self.assertIsNone(self.mapper.get_entity_variable(entities[0]))
+
+    def test_can_name_variables_and_params_per_mapper(self):
+        other = Mapper(request=self.request)
+        v1 = self.mapper.create({'some_field': 'one'}, TestVertex)
+        v2 = other.create({'some_field': 'two'}, TestVertex)
+        v3 = self.mapper.create({'some_field': 'three'}, TestVertex)
+
+        self.mapper.save(v1)
+        other.save(v2)
+        other.reset()
+        self.mapper.save(v3)
+
+        variables = [self.mapper.get_entity_variable(v) for v in (v1, v3)]
+        params = self.mapper.params
+
+        self.assertEqual(['gizmo_var_0', 'gizmo_var_1'], variables)
+        self.assertIn('one', params.values())
+        self.assertIn('three', params.values())
+
+    def build_script(self, mapper, *entities):
+        for entity in entities:
+            mapper.save(entity)
+
+        mapper._build_queries()
+        script = ';\n'.join(mapper.queries)
+        params = mapper.params
+
+        mapper.reset()
+
+        return script, params
+
+    def test_can_build_identical_canonical_scripts_for_same_shape(self):
+
+        class OtherVertex(GenericVertex):
+            pass
+
+        mapper = Mapper(request=self.request, canonical=True)
+        v1 = mapper.create({'name': 'mark', 'age': 1}, TestVertex)
+        v2 = mapper.create({'name': 'steve', 'age': 2}, OtherVertex)
+        v3 = mapper.create({'id': '10', 'name': 'john'}, TestVertex)
+        v4 = mapper.create({'id': '11', 'name': 'paul'}, TestVertex)
+        v3['name'] = 'johnny'
+        v4['name'] = 'pauly'
+        script1, params1 = self.build_script(mapper, v1, v3)
+        script2, params2 = self.build_script(mapper, v2, v4)
+
+        self.assertEqual(script1, script2)
+        self.assertNotEqual(params1, params2)
+        self.assertEqual(sorted(params1.keys()), sorted(params2.keys()))
+        self.assertIn('mark', params1.values())
+        self.assertIn('steve', params2.values())
+
+    def test_can_build_different_canonical_scripts_for_different_shapes(self):
+        mapper = Mapper(request=self.request, canonical=True)
+        v1 = mapper.create({'name': 'mark'}, TestVertex)
+        v2 = mapper.create({'name': 'steve', 'age': 2}, TestVertex)
+        script1, _ = self.build_script(mapper, v1)
+        script2, _ = self.build_script(mapper, v2)
+
+        self.assertNotEqual(script1, script2)
+
+    def test_can_build_identical_update_scripts_for_different_ids(self):
+        v1 = self.mapper.create({'id': '10', 'name': 'john'}, TestVertex)
+        v2 = self.mapper.create({'id': '11', 'name': 'paul'}, TestVertex)
+        v1['name'] = 'johnny'
+        v2['name'] = 'pauly'
+        script1, params1 = self.build_script(self.mapper, v1)
+        script2, params2 = self.build_script(self.mapper, v2)
+
+        self.assertEqual(script1, script2)
+        self.assertNotEqual(params1, params2)
+
     def test_can_assure_saving_vertex_mulitple_times_only_crud_once(self):
         d = {'some_field': str(random())}
         v = self.mapper.create(d, TestVertex)
@@ -1109,5 +1425,519 @@ class CustomMapperTests(unittest.TestCase):
         self.ioloop.run_until_complete(test())
 
 
+class BulkSaveTests(unittest.TestCase):
+
+    def setUp(self):
+        self.request = TestSaveRequest()
+        self.mapper = Mapper(self.request, Gremlin())
+        self.ioloop = asyncio.get_event_loop()
+
+    def test_can_group_same_shaped_vertices_into_one_statement(self):
+        users = [self.mapper.create({'name': str(i)}, TestVertex)
+            for i in range(10)]
+        others = [self.mapper.create({'name': str(i), 'age': i}, TestVertex)
+            for i in range(3)]
+
+        self.mapper.bulk_save(users + others)
+
+        self.assertEqual(2, len(self.mapper.queries))
+        self.assertEqual(2, len(self.mapper.return_vars))
+
+        variable = self.mapper.return_vars[0]
+        rows = [p for p in self.mapper.params.values()
+            if isinstance(p, list)]
+
+        self.assertEqual('{}[3]'.format(variable),
+            self.mapper.get_entity_variable(users[3]))
+        self.assertEqual([[str(i)] for i in range(10)],
+            [row['name'] for row in rows[0]])
+        self.assertIn('.collect{', self.mapper.queries[0])
+
+    def test_can_save_an_entity_listed_twice_once(self):
+        user = self.mapper.create({'name': 'user'}, TestVertex)
+        edge = self.mapper.connect(user, user, 'knows')
+
+        self.mapper.bulk_save([user, user, edge, edge])
+
+        rows = [p for p in self.mapper.params.values()
+            if isinstance(p, list)]
+
+        self.assertEqual(1, len(rows))
+        self.assertEqual(1, len(rows[0]))
+        self.assertEqual(2, len(self.mapper.queries))
+
+    def test_can_save_ineligible_entities_individually(self):
+        existing = self.mapper.create({'id': '99', 'name': 'x'}, TestVertex)
+        existing['name'] = 'y'
+        users = [self.mapper.create({'name': str(i)}, TestVertex)
+            for i in range(3)]
+        edge = self.mapper.connect(users[0], users[1], edge_entity=TestEdge)
+
+        self.mapper.bulk_save(users + [existing, edge])
+        bulk = [q for q in self.mapper.queries if '.collect{' in q]
+
+        self.assertEqual(1, len(bulk))
+        self.assertEqual(3, len(self.mapper.return_vars))
+        self.assertIn('V({}[0])'.format(self.mapper.return_vars[0]),
+            self.mapper.queries[2])
+
+    def test_can_write_ids_back_and_call_callbacks(self):
+        called = []
+        users = [self.mapper.create({'name': str(i)}, TestVertex)
+            for i in range(5)]
+
+        async def test():
+            self.mapper.bulk_save(users, callback=called.append)
+            await self.mapper.send()
+
+            ids = [u[GIZMO_ID] for u in users]
+
+            self.assertEqual([str(i) for i in range(1, 6)], ids)
+            self.assertEqual(users, called)
+
+        self.ioloop.run_until_complete(test())
+
+
+class BatchSplittingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.request = TestSaveRequest()
+        self.ioloop = asyncio.get_event_loop()
+
+    def test_can_send_batch_in_one_request_within_limits(self):
+        mapper = Mapper(self.request, Gremlin(), max_statements=10)
+        users = [mapper.create({'name': str(i)}, TestVertex)
+            for i in range(3)]
+
+        async def test():
+            for user in users:
+                mapper.save(user)
+
+            await mapper.send()
+
+            self.assertEqual(1, len(self.request.sent))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_split_batch_by_statement_count(self):
+        mapper = Mapper(self.request, Gremlin(), max_statements=3)
+        users = [mapper.create({'name': str(i)}, TestVertex)
+            for i in range(6)]
+        called = []
+
+        async def test():
+            for user in users:
+                mapper.save(user, callback=called.append)
+
+            result = await mapper.send()
+
+            self.assertEqual(3, len(self.request.sent))
+            self.assertEqual(6, len(result))
+            self.assertTrue(all(u[GIZMO_ID] for u in users))
+            self.assertEqual(users, called)
+
+            for script, params in self.request.sent:
+                self.assertLessEqual(len(script.split(';\n')), 3)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_split_batch_by_bindings_and_script_size(self):
+        users = [TestVertex({'name': str(i)}) for i in range(6)]
+
+        async def test():
+            mapper = Mapper(self.request, Gremlin(), max_bindings=10)
+
+            for user in users:
+                mapper.save(user)
+
+            await mapper.send()
+
+            for script, params in self.request.sent:
+                self.assertLessEqual(len(params), 10)
+
+            sent = len(self.request.sent)
+            mapper = Mapper(self.request, Gremlin(), max_script_bytes=500)
+
+            for user in users:
+                user[GIZMO_ID] = None
+                mapper.save(user)
+
+            await mapper.send()
+
+            for script, params in self.request.sent[sent:]:
+                self.assertLessEqual(len(script), 500)
+
+            self.assertGreater(len(self.request.sent), sent + 1)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_reference_entities_saved_by_earlier_chunk(self):
+        mapper = Mapper(self.request, Gremlin(), max_statements=3)
+        users = [mapper.create({'name': str(i)}, TestVertex)
+            for i in range(4)]
+        edge = mapper.connect(users[0], users[3], edge_entity=TestEdge)
+
+        async def test():
+            for user in users:
+                mapper.save(user)
+
+            mapper.save(edge)
+            await mapper.send()
+
+            script, params = self.request.sent[-1]
+            rebind = '{0} = g.V({0}_id).next()'.format('gizmo_var_0')
+
+            self.assertIn(rebind, script)
+            self.assertEqual(users[0][GIZMO_ID], params['gizmo_var_0_id'])
+            self.assertTrue(edge[GIZMO_ID])
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_pipeline_independent_chunks(self):
+        mapper = Mapper(self.request, Gremlin(), max_statements=2,
+                        pipeline=True)
+        users = [mapper.create({'name': str(i)}, TestVertex)
+            for i in range(6)]
+
+        async def test():
+            for user in users:
+                mapper.save(user)
+
+            await mapper.send()
+
+            self.assertEqual(6, len(self.request.sent))
+            self.assertEqual(6, self.request.max_in_flight)
+            self.assertTrue(all(u[GIZMO_ID] for u in users))
+
+        self.ioloop.run_until_complete(test())
+
+
+class StreamingCollectionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = [[{'id': '{}_{}'.format(b, i), 'name': str(random())}
+            for i in range(3)] for b in range(5)]
+        self.request = TestStreamRequest(self.batches)
+        self.mapper = Mapper(self.request, Gremlin())
+        self.ioloop = asyncio.get_event_loop()
+
+    def test_can_iterate_streamed_entities_in_order(self):
+
+        async def test():
+            ids = []
+
+            async for entity in self.mapper.stream(script='g.V()'):
+                self.assertIsInstance(entity, GenericVertex)
+                ids.append(entity[GIZMO_ID])
+
+            expected = [v['id'] for batch in self.batches for v in batch]
+
+            self.assertEqual(expected, ids)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_iterate_streamed_entities_without_prefetch(self):
+
+        async def test():
+            collection = self.mapper.stream(script='g.V()', prefetch=0)
+            entity = await collection.__anext__()
+            stream = self.request.streams[0]
+
+            self.assertEqual(self.batches[0][0]['id'], entity[GIZMO_ID])
+            self.assertEqual(1, stream.read)
+
+            count = 1
+
+            async for entity in collection:
+                count += 1
+
+            self.assertEqual(15, count)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_bound_batches_read_ahead(self):
+
+        async def test():
+            collection = self.mapper.stream(script='g.V()', prefetch=1)
+
+            await collection.__anext__()
+
+            for i in range(5):
+                await asyncio.sleep(0)
+
+            stream = self.request.streams[0]
+
+            # the batch being consumed, one queued and one waiting to be
+            self.assertLessEqual(stream.read, 3)
+            self.assertLess(stream.read, len(self.batches))
+
+            await collection.close()
+
+            self.assertTrue(stream.closed)
+
+        self.ioloop.run_until_complete(test())
+
+
+class TestEchoSaveRequest(TestSaveRequest):
+    """answers a save with the entity's own id and name"""
+
+    def vertex(self, entity):
+        vertex = super().vertex(entity)
+        vertex['id'] = entity[GIZMO_ID] or vertex['id']
+        vertex['properties'] = {'name': [{'id': 1,
+            'value': entity['name'].values[0]}]}
+
+        return vertex
+
+
+class IdentityMapTests(unittest.TestCase):
+
+    def setUp(self):
+        self.request = TestEchoSaveRequest()
+        self.mapper = Mapper(self.request, Gremlin())
+        self.ioloop = asyncio.get_event_loop()
+
+    def test_can_return_the_same_instance_within_a_scope(self):
+        resp = Response()
+        resp.result = {'data': [
+            {'id': 1, 'type': 'vertex', 'name': [{'id': 1, 'value': 'a'}]},
+            {'id': 1, 'type': 'vertex', 'name': [{'id': 2, 'value': 'b'}]},
+            {'id': 1, 'type': 'edge', 'name': [{'id': 3, 'value': 'c'}]},
+        ]}
+
+        with self.mapper.identity_scope() as identity_map:
+            collection = Collection(self.mapper, resp)
+            first, second, edge = collection[0], collection[1], collection[2]
+            created = self.mapper.create({'id': '1'}, TestVertex)
+
+            self.assertIs(first, second)
+            self.assertIs(first, created)
+            self.assertIsNot(first, edge)
+            self.assertEqual(['a'], second['name'].values)
+            self.assertEqual(2, len(identity_map))
+
+            with self.mapper.identity_scope() as nested:
+                self.assertIs(identity_map, nested)
+
+        self.assertIsNone(self.mapper.identity_map)
+        self.assertIsNot(Collection(self.mapper, resp)[0],
+                         Collection(self.mapper, resp)[1])
+
+    def test_can_keep_overlapping_scopes_of_coroutines_apart(self):
+        opened = asyncio.Event()
+        exited = asyncio.Event()
+        maps = {}
+
+        async def first():
+            with self.mapper.identity_scope() as identity_map:
+                maps['first'] = identity_map
+                entity = self.mapper.create({'id': '1'}, TestVertex)
+
+                await opened.wait()
+
+                self.assertIs(entity, self.mapper.create({'id': '1'},
+                                                         TestVertex))
+
+            exited.set()
+
+        async def second():
+            with self.mapper.identity_scope() as identity_map:
+                maps['second'] = identity_map
+                entity = self.mapper.create({'id': '1'}, TestVertex)
+                opened.set()
+
+                await exited.wait()
+
+                self.assertIs(identity_map, self.mapper.identity_map)
+                self.assertIs(entity, identity_map.get(('vertex', '1')))
+
+        async def test():
+            await asyncio.gather(first(), second())
+
+            self.assertIsNot(maps['first'], maps['second'])
+            self.assertIsNot(maps['first'].get(('vertex', '1')),
+                             maps['second'].get(('vertex', '1')))
+            self.assertIsNone(self.mapper.identity_map)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_map_saved_entities_and_update_mapped_instances(self):
+        outside = TestVertex({'id': '7', 'name': 'new'})
+
+        async def test():
+            with self.mapper.identity_scope() as identity_map:
+                user = self.mapper.create({'name': 'user'}, TestVertex)
+                cached = self.mapper.create({'id': '7', 'name': 'old'},
+                                            TestVertex)
+                keys = set(cached.fields.fields)
+
+                self.assertNotIn(user, identity_map)
+
+                self.mapper.save(user)
+                await self.mapper.send()
+
+                self.assertIn(user, identity_map)
+                self.assertIs(user, self.mapper.create(
+                    {'id': user[GIZMO_ID]}, TestVertex))
+
+                self.mapper.save(outside)
+                await self.mapper.send()
+
+                self.assertIs(cached, identity_map.get(('vertex', '7')))
+                self.assertEqual(['new'], cached['name'].values)
+                self.assertEqual(str(TestVertex), cached[GIZMO_LABEL[0]])
+                self.assertEqual(keys, set(cached.fields.fields))
+
+                self.mapper.delete(cached)
+                await self.mapper.send()
+
+                self.assertNotIn(cached, identity_map)
+                self.assertIsNot(cached, self.mapper.create({'id': '7'},
+                                                            TestVertex))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_update_mapped_generic_instances_without_losing_fields(self):
+        outside = GenericVertex({'id': '8', 'name': 'new'})
+
+        async def test():
+            with self.mapper.identity_scope():
+                cached = self.mapper.create({'id': '8', 'name': 'old'},
+                                            GenericVertex)
+                keys = set(cached.fields.fields)
+
+                self.mapper.save(outside)
+                await self.mapper.send()
+
+                self.assertEqual(['new'], cached['name'].values)
+                self.assertEqual('generic_vertex', cached[GIZMO_LABEL[0]])
+                self.assertEqual(keys, set(cached.fields.fields))
+                self.assertEqual(entity_name(GenericVertex),
+                                 cached[GIZMO_ENTITY])
+
+        self.ioloop.run_until_complete(test())
+
+
+class DataLoaderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ioloop = asyncio.get_event_loop()
+        self.batches = []
+
+    async def batch_load(self, keys):
+        self.batches.append(keys)
+
+        return [ValueError(k) if k < 0 else k * 10 for k in keys]
+
+    def test_can_coalesce_loads_made_in_the_same_tick(self):
+        loader = DataLoader(self.batch_load)
+
+        async def test():
+            results = await asyncio.gather(loader.load(1), loader.load(2),
+                                           loader.load(1), loader.load(3))
+            more = await loader.load_many([4, 5])
+
+            self.assertEqual([10, 20, 10, 30], results)
+            self.assertEqual([40, 50], more)
+            self.assertEqual([[1, 2, 3], [4, 5]], self.batches)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_split_batches_and_cache_results(self):
+        loader = DataLoader(self.batch_load, max_batch_size=2, cache=True)
+
+        async def test():
+            await loader.load_many([1, 2, 3])
+            await loader.load_many([1, 2])
+
+            self.assertEqual([[1, 2], [3]], self.batches)
+
+            loader.clear(1)
+            await loader.load(1)
+
+            self.assertEqual([1], self.batches[-1])
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_fail_only_the_keys_that_errored(self):
+        loader = DataLoader(self.batch_load)
+
+        async def test():
+            results = await asyncio.gather(loader.load(1), loader.load(-1),
+                                           return_exceptions=True)
+
+            self.assertEqual(10, results[0])
+            self.assertIsInstance(results[1], ValueError)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_hold_pending_batches_until_they_are_done(self):
+        loader = DataLoader(self.batch_load)
+
+        async def test():
+            future = loader.load(1)
+
+            await asyncio.sleep(0)
+
+            self.assertEqual(1, len(loader._tasks))
+            self.assertEqual(10, await future)
+
+            await asyncio.sleep(0)
+
+            self.assertEqual(0, len(loader._tasks))
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_get_related_entities_in_one_query(self):
+        request = TestRelatedRequest({'a': ['a1', 'a2'], 'b': ['b1']})
+        mapper = Mapper(request=request)
+        parents = [mapper.create({'id': _id}, GenericVertex)
+                   for _id in ('a', 'b', 'c')]
+
+        async def test():
+            related = await asyncio.gather(*[mapper.related(p, 'knows')
+                                             for p in parents])
+            names = [[r['name'].values[0] for r in rel] for rel in related]
+
+            self.assertEqual([['a1', 'a2'], ['b1'], []], names)
+            self.assertEqual(1, len(request.sent))
+
+            script, params = request.sent[0]
+
+            self.assertIn('.out(related_label)', script)
+            self.assertEqual(['a', 'b', 'c'], params['related_ids'])
+            self.assertEqual('knows', params['related_label'])
+
+        self.ioloop.run_until_complete(test())
+
+    def test_can_get_related_entities_with_native_integer_ids(self):
+        request = TestRelatedRequest({1: ['one'], 2: ['two', 'deux']})
+        mapper = Mapper(request=request)
+        parents = [mapper.create({'id': _id}, GenericVertex)
+                   for _id in (1, 2)]
+
+        async def test():
+            related = await asyncio.gather(*[mapper.related(p, 'knows')
+                                             for p in parents])
+            names = [[r['name'].values[0] for r in rel] for rel in related]
+
+            self.assertEqual([['one'], ['two', 'deux']], names)
+
+        self.ioloop.run_until_complete(test())
+
+    def test_cannot_get_related_entities_without_an_id(self):
+        mapper = Mapper(request=TestRelatedRequest({}))
+
+        async def test():
+            with self.assertRaises(AstronomerMapperException):
+                await mapper.related(GenericVertex(), 'knows')
+
+            with self.assertRaises(AstronomerMapperException):
+                await mapper.related(GenericVertex({'id': 1}),
+                                     direction='sideways')
+
+        self.ioloop.run_until_complete(test())
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
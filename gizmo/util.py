@@ -1,3 +1,4 @@
+import functools
 import re
 import time
 
@@ -9,6 +10,7 @@ GIZMO_LABEL = ('label', 'T.label')
 GIZMO_TYPE = 'type'
 GIZMO_ENTITY = '__GIZMO_ENTITY__'
 GIZMO_VARIABLE = 'gizmo_var'
+GIZMO_PARAM = 'gizmo_param'
 
 
 def camel_to_underscore(name):
@@ -45,11 +47,16 @@ def is_gremlin_entity(data):
     return False
 
 
+@functools.lru_cache(maxsize=256)
+def _debug_pattern(names):
+    return re.compile(r'\b(' + '|'.join(map(re.escape, names)) + r')\b')
+
+
 def _query_debug(script, params): # pragma: no cover
     if not len(params):
         return script
 
-    pattern = re.compile(r'\b(' + '|'.join(params.keys()) + r')\b')
+    pattern = _debug_pattern(tuple(params))
 
     def su(x):
         x = str(params[x.group()]) if params[x.group()] else ''
@@ -58,6 +65,24 @@ def _query_debug(script, params): # pragma: no cover
     return pattern.sub(su, script)
 
 
+class _QueryDebug:
+    """the script with its params substituted, rendered the first time it
+    is turned into a string. Passing it to logger.debug only costs the
+    rendering when a handler actually emits the record
+    """
+
+    def __init__(self, script, params):
+        self.script = script
+        self.params = params
+        self._query = None
+
+    def __str__(self):
+        if self._query is None:
+            self._query = _query_debug(self.script, self.params)
+
+        return self._query
+
+
 def current_date_time(offset=0): # pragma: no cover
     return (int(time.time()) + offset)
 
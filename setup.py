@@ -27,6 +27,10 @@ setup(
     author_email = 'emehrkay@gmail.com',
     long_description = __doc__,
     install_requires = install_requires,
+    extras_require = {
+        'orjson': ['orjson'],
+        'ujson': ['ujson'],
+    },
     classifiers = [
         'License :: OSI Approved :: MIT License',
         'Development Status :: 3 - Alpha',